@@ -31,14 +31,9 @@ async def get_defects_data(
             logger.error(f"Account {account_id} not found")
             return None
 
-        # Check if defects configuration exists
-        defects_config = account_data.get('defects')
-        if not defects_config:
-            logger.error(f"No defects configuration for account {account_id}")
-            return None
-
-        token = defects_config.get('token')
-        supplier_id = defects_config.get('supplier_id')
+        defects_config = account_data.defects
+        token = defects_config.token
+        supplier_id = defects_config.supplier_id
 
         if not token or not supplier_id:
             logger.error(f"Missing token or supplier_id for account {account_id}")
@@ -65,7 +60,7 @@ async def get_defects_data(
             "pretension_type": 2  # DEFECTS only
         }
 
-        logger.info(f"Fetching defects for {account_data['name']} for last {days} days")
+        logger.info(f"Fetching defects for {account_data.name} for last {days} days")
 
         async with aiohttp.ClientSession() as session:
             async with session.get(url, headers=headers, params=params) as response:
@@ -84,10 +79,10 @@ async def get_defects_data(
                         for item in defects_data:
                             if isinstance(item, dict):
                                 item['retention_type'] = 'БРАК'  # Mark as defect
-                                item['account_name'] = account_data['name']
+                                item['account_name'] = account_data.name
                                 item['account_id'] = account_id
 
-                    logger.info(f"Got {len(defects_data)} defects for {account_data['name']}")
+                    logger.info(f"Got {len(defects_data)} defects for {account_data.name}")
 
                     # Fetch driver info for each defect if requested
                     if fetch_drivers and defects_data:
@@ -127,7 +122,7 @@ async def get_defects_data(
                                 # Call progress callback if provided
                                 if progress_callback:
                                     try:
-                                        await progress_callback(processed, total_boxes, account_data['name'])
+                                        await progress_callback(processed, total_boxes, account_data.name)
                                     except Exception as e:
                                         logger.debug(f"Progress callback error: {e}")
 
@@ -135,7 +130,7 @@ async def get_defects_data(
 
                     return defects_data
                 else:
-                    logger.error(f"API error for {account_data['name']}: {response.status}")
+                    logger.error(f"API error for {account_data.name}: {response.status}")
                     text = await response.text()
                     logger.error(f"Response: {text}")
                     return None
@@ -158,7 +153,7 @@ async def get_all_defects_data(
     results = {}
 
     for account_id, account_data in accounts.items():
-        if account_data.get('defects', {}).get('enabled', False):
+        if account_data.defects.enabled:
             defects = await get_defects_data(account_id, days, fetch_drivers=True, progress_callback=progress_callback)
             if defects:
                 results[account_id] = defects
@@ -175,8 +170,7 @@ async def get_driver_info(transfer_box_id: str, account_id: str) -> str:
         if not account_data:
             return "Н/Д"
 
-        defects_config = account_data.get('defects', {})
-        token = defects_config.get('token')
+        token = account_data.defects.token
 
         if not token:
             return "Н/Д"
@@ -22,8 +22,10 @@ from ostatki.router import show_ostatki_menu, send_scheduled_reports, send_repor
 from shipment.router import router as shipment_router
 from shipment.router import show_shipment_menu
 from shipment.monitor import stop_all_monitoring
+from shipment.api import close_session as close_shipment_session
 from retentions.router import router as retentions_router
 from retentions.scheduler import send_retentions_alerts
+from retentions.api import close_session as close_retentions_session
 from defects.router import router as defects_router
 from defects.router import send_defects_to_channel
 
@@ -325,6 +327,10 @@ async def main():
         # Shutdown scheduler
         scheduler.shutdown(wait=False)
 
+        # Close API sessions
+        await close_shipment_session()
+        await close_retentions_session()
+
         # Close bot session
         await bot.session.close()
 
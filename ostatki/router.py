@@ -15,6 +15,7 @@ from ostatki.api import get_wb_report, create_excel_from_json
 from ostatki.formatter import format_last_mile_text
 from ostatki.data import add_route, get_routes, save_routes
 from utils.config import accounts, OSTATKI_PM_CHANNEL
+from utils.message_util import update_messages_bulk
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -72,7 +73,7 @@ def get_account_selection_keyboard(callback_prefix: str) -> InlineKeyboardMarkup
 
     # Add enabled accounts
     for i, (account_id, account_data) in enumerate(accounts.items()):
-        if account_data['enabled']['ostatki']:
+        if account_data.enabled.ostatki:
             # Create rows with 2 buttons each
             if i % 2 == 0 and row:
                 keyboard.append(row)
@@ -80,7 +81,7 @@ def get_account_selection_keyboard(callback_prefix: str) -> InlineKeyboardMarkup
 
             row.append(
                 InlineKeyboardButton(
-                    text=account_data['name'],
+                    text=account_data.name,
                     callback_data=f"{callback_prefix}{account_id}"
                 )
             )
@@ -199,11 +200,11 @@ async def callback_ostatki_report_account(callback: CallbackQuery):
     # Extract account ID from callback data
     account_id = callback.data.replace("ostatki_report_", "")
 
-    if account_id in accounts and accounts[account_id]['enabled']['ostatki']:
+    if account_id in accounts and accounts[account_id].enabled.ostatki:
         account_data = accounts[account_id]
-        token = account_data['ostatki']['token']
-        account_name = account_data['name']
-        office_id = account_data['ostatki']['office_id']
+        token = account_data.ostatki.token
+        account_name = account_data.name
+        office_id = account_data.ostatki.office_id
 
         # Update message to show loading
         await callback.bot.edit_message_text(
@@ -279,10 +280,10 @@ async def callback_ostatki_excel_account(callback: CallbackQuery):
     # Extract account ID from callback data
     account_id = callback.data.replace("ostatki_excel_", "")
 
-    if account_id in accounts and accounts[account_id]['enabled']['ostatki']:
+    if account_id in accounts and accounts[account_id].enabled.ostatki:
         account_data = accounts[account_id]
-        token = account_data['ostatki']['token']
-        account_name = account_data['name']
+        token = account_data.ostatki.token
+        account_name = account_data.name
 
         # Update message to show loading
         await callback.bot.edit_message_text(
@@ -410,7 +411,7 @@ async def callback_ostatki_list_routes(callback: CallbackQuery):
 
     for account_key, account_routes in routes.items():
         if account_routes:
-            account_name = accounts.get(account_key, {}).get('name', account_key)
+            account_name = accounts[account_key].name if account_key in accounts else account_key
             response += f"*{account_name}:*\n"
 
             for route_id, route_info in account_routes.items():
@@ -460,8 +461,8 @@ async def callback_ostatki_add_route(callback: CallbackQuery):
 
     # Add available accounts
     for account_id, account_data in accounts.items():
-        if account_data['enabled']['ostatki']:
-            instructions += f"- `{account_id}`: {account_data['name']}\n"
+        if account_data.enabled.ostatki:
+            instructions += f"- `{account_id}`: {account_data.name}\n"
 
     # Show instructions
     await callback.bot.edit_message_text(
@@ -503,10 +504,10 @@ async def callback_ostatki_send_to_group(callback: CallbackQuery):
     error_count = 0
 
     for account_id, account_data in accounts.items():
-        if account_data['enabled']['ostatki']:
-            token = account_data['ostatki']['token']
-            account_name = account_data['name']
-            office_id = account_data['ostatki']['office_id']
+        if account_data.enabled.ostatki:
+            token = account_data.ostatki.token
+            account_name = account_data.name
+            office_id = account_data.ostatki.office_id
 
             try:
                 # Get report data
@@ -570,10 +571,10 @@ async def cmd_add_route(message: Message):
         shk_norm = int(args[4])
         fuel_norm = float(args[5]) if len(args) == 6 else None
 
-        if account_key not in accounts or not accounts[account_key]['enabled']['ostatki']:
+        if account_key not in accounts or not accounts[account_key].enabled.ostatki:
             await message.answer(
                 f'Ошибка: аккаунт {account_key} не существует или не включен.\n'
-                f'Доступные аккаунты: {", ".join([a for a, d in accounts.items() if d["enabled"]["ostatki"]])}'
+                f'Доступные аккаунты: {", ".join([a for a, d in accounts.items() if d.enabled.ostatki])}'
             )
             return
 
@@ -630,12 +631,12 @@ async def send_scheduled_reports(bot: Bot):
 
     # Send reports for all enabled accounts
     for account_id, account_data in accounts.items():
-        if not account_data['enabled']['ostatki']:
+        if not account_data.enabled.ostatki:
             continue
 
-        token = account_data['ostatki']['token']
-        account_name = account_data['name']
-        office_id = account_data['ostatki']['office_id']
+        token = account_data.ostatki.token
+        account_name = account_data.name
+        office_id = account_data.ostatki.office_id
 
         try:
             # Get report data
@@ -645,17 +646,14 @@ async def send_scheduled_reports(bot: Bot):
                 # Format report
                 formatted_text = format_last_mile_text(report_data, account_name, account_id)
 
-                # Send to each subscribed user
-                for user_id in subscribed_users:
-                    try:
-                        await bot.send_message(
-                            chat_id=user_id,
-                            text=formatted_text,
-                            parse_mode=ParseMode.MARKDOWN
-                        )
-                        logger.info(f"Report for {account_name} sent to user {user_id}")
-                    except Exception as e:
-                        logger.error(f"Error sending report to user {user_id}: {e}", exc_info=True)
+                # Send to all subscribed users concurrently
+                message_ids = await update_messages_bulk(
+                    bot,
+                    [(user_id, formatted_text, None) for user_id in subscribed_users],
+                    parse_mode=ParseMode.MARKDOWN
+                )
+                sent = sum(1 for message_id in message_ids if message_id)
+                logger.info(f"Report for {account_name} sent to {sent}/{len(subscribed_users)} users")
         except Exception as e:
             logger.error(f"Error getting report for {account_name}: {e}", exc_info=True)
 
@@ -675,12 +673,12 @@ async def send_reports_to_group(bot: Bot):
 
     # Send reports for all enabled accounts
     for account_id, account_data in accounts.items():
-        if not account_data['enabled']['ostatki']:
+        if not account_data.enabled.ostatki:
             continue
 
-        token = account_data['ostatki']['token']
-        account_name = account_data['name']
-        office_id = account_data['ostatki']['office_id']
+        token = account_data.ostatki.token
+        account_name = account_data.name
+        office_id = account_data.ostatki.office_id
 
         try:
             # Get report data
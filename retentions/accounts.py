@@ -0,0 +1,72 @@
+"""
+Cache of accounts with retentions monitoring enabled
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from utils.config import accounts
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class RetentionAccount:
+    """Account with retentions configured"""
+    account_id: str
+    name: str
+    token: str = field(repr=False)
+    supplier_id: str
+
+
+def _build_retention_accounts() -> List[RetentionAccount]:
+    """
+    Build retentions accounts from config
+    Accounts are loaded once and fixed for the life of the process, so this runs only at import
+
+    Returns:
+        List of retentions accounts in config order
+    """
+    retention_accounts = []
+    for account_id, account_data in accounts.items():
+        retentions_config = account_data.retentions
+        if not retentions_config.enabled:
+            continue
+
+        retention_accounts.append(RetentionAccount(
+            account_id=account_id,
+            name=account_data.name,
+            token=retentions_config.token,
+            supplier_id=retentions_config.supplier_id
+        ))
+
+    logger.info(f"Retentions enabled for {len(retention_accounts)} accounts")
+    return retention_accounts
+
+
+_RETENTION_ACCOUNTS: List[RetentionAccount] = _build_retention_accounts()
+_RETENTION_ACCOUNTS_BY_ID: Dict[str, RetentionAccount] = {acc.account_id: acc for acc in _RETENTION_ACCOUNTS}
+
+
+def get_retention_accounts() -> List[RetentionAccount]:
+    """
+    Get all accounts with retentions enabled
+
+    Returns:
+        List of retentions accounts in config order
+    """
+    return _RETENTION_ACCOUNTS
+
+
+def get_retention_account(account_id: str) -> Optional[RetentionAccount]:
+    """
+    Get retentions account by ID
+
+    Args:
+        account_id: Account ID
+
+    Returns:
+        Retentions account or None if not found or retentions disabled
+    """
+    return _RETENTION_ACCOUNTS_BY_ID.get(account_id)
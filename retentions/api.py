@@ -2,26 +2,151 @@
 API module for WB retentions and driver info
 """
 
+import asyncio
 import json
 import logging
 import traceback
 import time
+from dataclasses import dataclass, field, fields, asdict, replace
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any, Optional
-import requests
+from typing import List, Dict, Any, Optional, Tuple
+import aiohttp
+
+from utils.async_util import gather_with_concurrency
+from utils.datetime_util import parse_iso_datetime
 
 logger = logging.getLogger(__name__)
 
+# Constants
+RETENTIONS_API_URL = "https://logistics.wb.ru/lost-and-found-tares/v1/public/lost-and-found"
+
+# Tare status for lost tares that lead to retentions
+TARE_STATUS_LOST = 'TARE_STATUS_LOST'
+
+TRANSFER_BOX_INFO_URL = "https://logistics.wb.ru/transfer-boxes-service/api/v1/transfer-boxes/{tare_id}/shipment-info"
+
+# Maximum number of accounts checked at once
+ACCOUNTS_CONCURRENCY = 8
+
+# Maximum number of driver lookups in flight per report
+DRIVER_LOOKUP_CONCURRENCY = 16
+
+# Retentions data cache settings
+RETENTIONS_CACHE_TTL = 30  # seconds
+RETENTIONS_CACHE_SIZE = 32
+
+# Shared HTTP session, created on first use
+_session: Optional[aiohttp.ClientSession] = None
 
-def api_request_with_retry(url: str, method: str, headers: Dict,
-                          data: Optional[Dict] = None,
-                          params: Optional[Dict] = None,
-                          max_retries: int = 3,
-                          timeout: int = 30) -> Optional[requests.Response]:
+
+async def get_session() -> aiohttp.ClientSession:
+    """
+    Get shared aiohttp session for retentions API requests
+
+    Returns:
+        Open aiohttp session with keep-alive connection pool
+    """
+    global _session
+
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=64,
+            limit_per_host=16,
+            keepalive_timeout=60,
+            ttl_dns_cache=300
+        )
+        _session = aiohttp.ClientSession(connector=connector)
+
+    return _session
+
+
+async def close_session() -> None:
+    """Close shared aiohttp session on shutdown"""
+    global _session
+
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def _get_headers(token: str) -> Dict[str, str]:
+    """Build request headers for WB logistics API"""
+    return {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    }
+
+
+@dataclass(slots=True)
+class Retention:
+    """Waysheet with possible retentions (lost tares)"""
+    waysheet_id: Optional[Any] = None
+    open_dt: Optional[str] = None
+    created_dt: Optional[str] = None
+    src_office_name: Optional[str] = None
+    tares: List[Dict[str, Any]] = field(default_factory=list)
+
+    # Filled in by merge_retentions_with_drivers
+    driver_name: Optional[str] = None
+    has_driver_data: bool = False
+
+    # Filled in by add_timer_info_to_retentions
+    remaining_hours: Optional[int] = None
+    remaining_minutes: Optional[int] = None
+    remaining_seconds: Optional[int] = None
+    total_remaining_hours: Optional[float] = None
+    deadline_dt: Optional[str] = None
+    time_expired: bool = False
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Retention":
+        """Create retention from API record, ignoring unknown fields"""
+        retention = cls(**{k: v for k, v in data.items() if k in _RETENTION_FIELDS})
+        if not retention.waysheet_id:
+            # Waysheet ID may come under another key
+            retention.waysheet_id = next(
+                (data[key] for key in _WAYSHEET_ID_KEYS if data.get(key)), None
+            )
+        if retention.tares is None:
+            retention.tares = []
+        return retention
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert retention to a plain dict"""
+        return asdict(self)
+
+
+_RETENTION_FIELDS = frozenset(f.name for f in fields(Retention))
+
+# Alternative keys of waysheet ID in API records, in priority order
+_WAYSHEET_ID_KEYS = ('№', 'id', 'waybillId', 'waysheetId')
+
+
+def _extract_retentions(data: Any) -> List[Retention]:
+    """Extract list of retentions from API response body"""
+    if isinstance(data, dict) and 'data' in data:
+        records = data['data']
+    elif isinstance(data, list):
+        records = data
+    else:
+        records = [data]
+
+    return [Retention.from_dict(record) for record in records if isinstance(record, dict)]
+
+
+async def api_request_with_retry(session: aiohttp.ClientSession, url: str, method: str,
+                                       headers: Dict,
+                                       data: Optional[Dict] = None,
+                                       params: Optional[Dict] = None,
+                                       max_retries: int = 3,
+                                       timeout: int = 30) -> Optional[Tuple[int, bytes]]:
     """
     Execute API request with retry logic
 
     Args:
+        session: aiohttp session
         url: API endpoint URL
         method: HTTP method (GET, POST)
         headers: Request headers
@@ -31,27 +156,30 @@ def api_request_with_retry(url: str, method: str, headers: Dict,
         timeout: Request timeout in seconds
 
     Returns:
-        Response object or None if all attempts failed
+        Tuple of (status code, response body) or None if all attempts failed
     """
     for attempt in range(max_retries):
         try:
-            if method.upper() == 'GET':
-                response = requests.get(url, headers=headers, params=params, timeout=timeout)
-            else:  # POST
-                response = requests.post(url, headers=headers, json=data, timeout=timeout)
-
-            if response.status_code == 200:
-                return response
-            elif response.status_code >= 500 and attempt < max_retries - 1:
-                logger.warning(f"Server error {response.status_code}, retry {attempt+1}/{max_retries}")
-                time.sleep(2)
-            else:
-                return response
+            async with session.request(
+                method.upper(), url,
+                headers=headers,
+                params=params,
+                json=data if method.upper() != 'GET' else None,
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                content = await response.read()
+
+                if response.status >= 500 and attempt < max_retries - 1:
+                    logger.warning(f"Server error {response.status}, retry {attempt+1}/{max_retries}")
+                else:
+                    return response.status, content
+
+            await asyncio.sleep(2)
 
-        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
             if attempt < max_retries - 1:
                 logger.warning(f"Connection error: {str(e)}, retry {attempt+1}/{max_retries}")
-                time.sleep(2)
+                await asyncio.sleep(2)
             else:
                 logger.error(f"All request attempts exhausted: {str(e)}")
                 return None
@@ -59,7 +187,7 @@ def api_request_with_retry(url: str, method: str, headers: Dict,
     return None
 
 
-def get_retentions_data(token: str, supplier_id: str) -> Optional[List[Dict[str, Any]]]:
+async def get_retentions_data(token: str, supplier_id: str) -> List[Retention]:
     """
     Get retentions data from WB API
 
@@ -73,29 +201,16 @@ def get_retentions_data(token: str, supplier_id: str) -> Optional[List[Dict[str,
     try:
         logger.info(f"Getting retentions data for supplier {supplier_id}")
 
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-
-        api_url = "https://logistics.wb.ru/lost-and-found-tares/v1/public/lost-and-found"
         params = {"supplier_id": supplier_id}
 
-        response = api_request_with_retry(api_url, 'GET', headers, params=params)
+        session = await get_session()
+        response = await api_request_with_retry(
+            session, RETENTIONS_API_URL, 'GET', _get_headers(token), params=params
+        )
 
-        if response and response.status_code == 200:
+        if response and response[0] == 200:
             try:
-                data = response.json()
-
-                # Check response structure
-                if isinstance(data, dict) and 'data' in data:
-                    result = data['data']
-                elif isinstance(data, list):
-                    result = data
-                else:
-                    result = [data]
+                result = _extract_retentions(json.loads(response[1]))
 
                 logger.info(f"Received retentions data ({len(result)} records)")
                 return result
@@ -103,14 +218,14 @@ def get_retentions_data(token: str, supplier_id: str) -> Optional[List[Dict[str,
                 logger.error("Response is not valid JSON")
                 return []
         else:
-            status_code = response.status_code if response else "N/A"
-            response_text = response.text[:200] if response else "No response"
+            status_code = response[0] if response else "N/A"
+            response_text = response[1][:200].decode('utf-8', errors='replace') if response else "No response"
             logger.error(f"Retentions API error: {status_code} - {response_text}")
 
             if response:
-                if response.status_code == 500:
+                if status_code == 500:
                     logger.error("Internal server error in retentions API")
-                elif response.status_code in [401, 403]:
+                elif status_code in [401, 403]:
                     logger.error("Authorization error in retentions API. Check token")
 
             return []
@@ -121,77 +236,161 @@ def get_retentions_data(token: str, supplier_id: str) -> Optional[List[Dict[str,
         return []
 
 
-def get_driver_info_from_logistics(token: str, tare_ids: List[str]) -> Dict[str, str]:
+# (token, supplier_id) -> (fetch time, retentions)
+_retentions_cache: Dict[Tuple[str, str], Tuple[float, List[Retention]]] = {}
+# (token, supplier_id) -> fetch in progress
+_retentions_in_flight: Dict[Tuple[str, str], "asyncio.Future[List[Retention]]"] = {}
+
+
+async def get_retentions_data_cached(token: str, supplier_id: str) -> List[Retention]:
     """
-    Get driver information through API for specified tares
+    Get retentions data with short-lived cache
+
+    Results younger than RETENTIONS_CACHE_TTL are reused, and concurrent
+    calls for the same account share a single API request
 
     Args:
         token: Bearer token for authentication
-        tare_ids: List of tare IDs
+        supplier_id: Supplier ID for filtering
 
     Returns:
-        Dictionary {tare_id: driver_name}
+        List of retentions or empty list on error
     """
-    try:
-        logger.info(f"Getting driver info through API for {len(tare_ids)} tares")
+    key = (token, supplier_id)
 
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
+    cached = _retentions_cache.get(key)
+    if cached and time.monotonic() - cached[0] < RETENTIONS_CACHE_TTL:
+        logger.debug(f"Using cached retentions data for supplier {supplier_id}")
+        return [replace(retention) for retention in cached[1]]
 
-        drivers_info = {}
+    future = _retentions_in_flight.get(key)
+    if future is None:
+        future = asyncio.get_running_loop().create_future()
+        _retentions_in_flight[key] = future
+        try:
+            result = await get_retentions_data(token, supplier_id)
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark exception as retrieved if nobody else is waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            _retentions_cache.pop(key, None)
+            _retentions_cache[key] = (time.monotonic(), result)
+            # Evict oldest entries
+            while len(_retentions_cache) > RETENTIONS_CACHE_SIZE:
+                del _retentions_cache[next(iter(_retentions_cache))]
+        finally:
+            del _retentions_in_flight[key]
+    else:
+        logger.debug(f"Waiting for in-flight retentions request for supplier {supplier_id}")
+        result = await asyncio.shield(future)
+
+    # Callers update retentions in place, give each one its own copies
+    return [replace(retention) for retention in result]
+
+def _extract_driver_name(data: Any) -> Optional[str]:
+    """
+    Get driver name from transfer box shipment info response
 
-        for tare_id in tare_ids:
-            try:
-                api_url = f"https://logistics.wb.ru/transfer-boxes-service/api/v1/transfer-boxes/{tare_id}/shipment-info"
+    Args:
+        data: Parsed API response
 
-                logger.info(f"Requesting info for tare {tare_id}")
+    Returns:
+        Driver name or None if not present
+    """
+    if not isinstance(data, dict):
+        return None
 
-                response = api_request_with_retry(api_url, 'GET', headers, timeout=30)
+    # Check different possible paths for driver name
+    nested = data.get('data')
+    if isinstance(nested, dict) and 'driver_name' in nested:
+        return nested['driver_name']
+    return data.get('driver_name')
 
-                if response and response.status_code == 200:
-                    try:
-                        content = response.text
-                        logger.debug(f"API response for tare {tare_id}: {content[:200]}...")
 
-                        if content.strip():
-                            data = json.loads(content)
+async def _fetch_driver_name(session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                             headers: Dict[str, str], tare_id: str) -> Optional[str]:
+    """
+    Get driver name for single tare
 
-                            driver_name = None
+    Args:
+        session: aiohttp session
+        semaphore: Semaphore limiting concurrent lookups
+        headers: Request headers
+        tare_id: Tare ID
 
-                            # Check different possible paths for driver name
-                            if 'data' in data and 'driver_name' in data['data']:
-                                driver_name = data['data']['driver_name']
-                            elif 'driver_name' in data:
-                                driver_name = data['driver_name']
+    Returns:
+        Driver name or None if not found
+    """
+    async with semaphore:
+        try:
+            response = await api_request_with_retry(
+                session, TRANSFER_BOX_INFO_URL.format(tare_id=tare_id), 'GET', headers, timeout=30
+            )
+        except Exception as e:
+            logger.error(f"Error processing tare {tare_id}: {e}")
+            return None
+
+    if not response or response[0] != 200:
+        status_code = response[0] if response else "N/A"
+        logger.error(f"API error for tare {tare_id}: {status_code}")
+        if response:
+            logger.error(f"Response: {response[1][:100].decode('utf-8', errors='replace')}")
+        return None
+
+    content = response[1]
+    if not content.strip():
+        logger.warning(f"Empty API response for tare {tare_id}")
+        return None
+
+    try:
+        driver_name = _extract_driver_name(json.loads(content))
+    except json.JSONDecodeError as json_err:
+        logger.error(f"JSON decode error for tare {tare_id}: {json_err}")
+        return None
+    except Exception as e:
+        # Unexpected response shape must not fail lookups of other tares
+        logger.error(f"Error parsing response for tare {tare_id}: {e}")
+        return None
 
-                            if driver_name:
-                                drivers_info[str(tare_id)] = driver_name
-                                logger.info(f"Found driver for tare {tare_id}: {driver_name}")
-                            else:
-                                logger.warning(f"Response structure doesn't contain driver name for tare {tare_id}")
-                        else:
-                            logger.warning(f"Empty API response for tare {tare_id}")
+    if driver_name:
+        logger.info(f"Found driver for tare {tare_id}: {driver_name}")
+    else:
+        logger.warning(f"Response structure doesn't contain driver name for tare {tare_id}")
+    return driver_name
 
-                    except json.JSONDecodeError as json_err:
-                        logger.error(f"JSON decode error for tare {tare_id}: {json_err}")
-                        logger.error(f"Response start: {response.text[:100]}")
-                else:
-                    status_code = response.status_code if response else "N/A"
-                    logger.error(f"API error for tare {tare_id}: {status_code}")
-                    if response:
-                        logger.error(f"Response: {response.text[:100]}")
 
-            except Exception as e:
-                logger.error(f"Error processing tare {tare_id}: {e}")
+async def get_driver_info_from_logistics(token: str, tare_ids: List[str]) -> Dict[str, str]:
+    """
+    Get driver information through API for specified tares
+
+    Args:
+        token: Bearer token for authentication
+        tare_ids: List of tare IDs
 
-            # Small pause between requests to avoid overloading API
-            time.sleep(0.5)
+    Returns:
+        Dictionary {tare_id: driver_name}
+    """
+    unique_ids = list(dict.fromkeys(str(tare_id) for tare_id in tare_ids))
+    if not unique_ids:
+        return {}
+
+    try:
+        logger.info(f"Getting driver info through API for {len(unique_ids)} tares")
+
+        headers = _get_headers(token)
+        semaphore = asyncio.Semaphore(DRIVER_LOOKUP_CONCURRENCY)
 
-        logger.info(f"Got driver info for {len(drivers_info)}/{len(tare_ids)} tares")
+        session = await get_session()
+        names = await asyncio.gather(
+            *(_fetch_driver_name(session, semaphore, headers, tare_id) for tare_id in unique_ids)
+        )
+
+        drivers_info = {tare_id: name for tare_id, name in zip(unique_ids, names) if name}
+
+        logger.info(f"Got driver info for {len(drivers_info)}/{len(unique_ids)} tares")
         return drivers_info
 
     except Exception as e:
@@ -200,10 +399,12 @@ def get_driver_info_from_logistics(token: str, tare_ids: List[str]) -> Dict[str,
         return {}
 
 
-def merge_retentions_with_drivers(retentions_data: List[Dict], token: str) -> List[Dict]:
+async def merge_retentions_with_drivers(retentions_data: List[Retention], token: str) -> List[Retention]:
     """
     Merge retentions data with driver information and add timers
 
+    Driver lookups for all unique tares run concurrently
+
     Args:
         retentions_data: List of retentions
         token: Bearer token for authentication
@@ -216,57 +417,12 @@ def merge_retentions_with_drivers(retentions_data: List[Dict], token: str) -> Li
             logger.error("No retentions data to merge with drivers")
             return []
 
-        # Collect all tare IDs from retentions
-        tare_ids = []
-        tare_map = {}  # To link tares with retentions
-
-        for retention_idx, retention in enumerate(retentions_data):
-            # Get waysheet ID for logging
-            waysheet_id = None
-            for field in ['waysheet_id', '№', 'id', 'waybillId', 'waysheetId']:
-                if field in retention and retention[field]:
-                    waysheet_id = str(retention[field])
-                    break
-
-            logger.info(f"Processing retention with waysheet ID: {waysheet_id}")
-
-            # Process tares
-            for tare in retention.get('tares', []):
-                if 'tare_id' in tare and tare['tare_id']:
-                    tare_id = str(tare['tare_id'])
-                    tare_ids.append(tare_id)
-                    # Save connection between tare ID and retention index
-                    tare_map[tare_id] = retention_idx
-                    logger.debug(f"Added tare {tare_id} for retention with waysheet ID {waysheet_id}")
-
-        logger.info(f"Total collected {len(tare_ids)} tare IDs for driver info")
+        tare_map = _collect_tare_map(retentions_data)
 
         # Get driver info by tares
-        drivers_info = get_driver_info_from_logistics(token, tare_ids)
-
-        # Add timer info to all retentions
-        add_timer_info_to_retentions(retentions_data)
+        drivers_info = await get_driver_info_from_logistics(token, list(tare_map))
 
-        # Now add driver info for corresponding retentions
-        for tare_id, driver_name in drivers_info.items():
-            if tare_id in tare_map:
-                retention_idx = tare_map[tare_id]
-                retention = retentions_data[retention_idx]
-                # Add driver only if not already present
-                if 'driver_name' not in retention or not retention['driver_name'] or retention['driver_name'] == "Не найдено":
-                    retention['driver_name'] = driver_name
-                    retention['has_driver_data'] = True
-                    logger.info(f"Added driver {driver_name} for retention with tare {tare_id}")
-
-        # Set "Not found" status for retentions without drivers
-        for retention in retentions_data:
-            if 'driver_name' not in retention or not retention.get('driver_name'):
-                retention['driver_name'] = "Не найдено"
-                retention['has_driver_data'] = False
-
-        # Count statistics
-        matched_count = sum(1 for r in retentions_data if r.get('has_driver_data', False))
-        logger.info(f"Total retentions: {len(retentions_data)}, matched with driver data: {matched_count}")
+        _apply_driver_info(retentions_data, tare_map, drivers_info)
 
         return retentions_data
 
@@ -276,13 +432,77 @@ def merge_retentions_with_drivers(retentions_data: List[Dict], token: str) -> Li
 
         # In case of error, add empty driver info
         for retention in retentions_data:
-            retention['driver_name'] = "Ошибка сопоставления"
-            retention['has_driver_data'] = False
+            retention.driver_name = "Ошибка сопоставления"
+            retention.has_driver_data = False
 
         return retentions_data
 
 
-def add_timer_info_to_retentions(retentions_data: List[Dict]) -> None:
+def _collect_tare_map(retentions_data: List[Retention]) -> Dict[str, int]:
+    """
+    Collect unique tare IDs from retentions
+
+    Args:
+        retentions_data: List of retentions
+
+    Returns:
+        Dictionary {tare_id: retention index}
+    """
+    tare_map = {}  # To link tares with retentions
+
+    for retention_idx, retention in enumerate(retentions_data):
+        waysheet_id = retention.waysheet_id
+
+        logger.info(f"Processing retention with waysheet ID: {waysheet_id}")
+
+        # Process tares
+        for tare in retention.tares:
+            if 'tare_id' in tare and tare['tare_id']:
+                tare_id = str(tare['tare_id'])
+                # Save connection between tare ID and retention index
+                tare_map[tare_id] = retention_idx
+                logger.debug(f"Added tare {tare_id} for retention with waysheet ID {waysheet_id}")
+
+    logger.info(f"Total collected {len(tare_map)} tare IDs for driver info")
+    return tare_map
+
+
+def _apply_driver_info(retentions_data: List[Retention], tare_map: Dict[str, int],
+                       drivers_info: Dict[str, str]) -> None:
+    """
+    Add timers and driver names to retentions in place
+
+    Args:
+        retentions_data: List of retentions
+        tare_map: Dictionary {tare_id: retention index}
+        drivers_info: Dictionary {tare_id: driver_name}
+    """
+    # Add timer info to all retentions
+    add_timer_info_to_retentions(retentions_data)
+
+    # Now add driver info for corresponding retentions
+    for tare_id, driver_name in drivers_info.items():
+        if tare_id in tare_map:
+            retention_idx = tare_map[tare_id]
+            retention = retentions_data[retention_idx]
+            # Add driver only if not already present
+            if not retention.driver_name or retention.driver_name == "Не найдено":
+                retention.driver_name = driver_name
+                retention.has_driver_data = True
+                logger.info(f"Added driver {driver_name} for retention with tare {tare_id}")
+
+    # Set "Not found" status for retentions without drivers
+    for retention in retentions_data:
+        if not retention.driver_name:
+            retention.driver_name = "Не найдено"
+            retention.has_driver_data = False
+
+    # Count statistics
+    matched_count = sum(1 for r in retentions_data if r.has_driver_data)
+    logger.info(f"Total retentions: {len(retentions_data)}, matched with driver data: {matched_count}")
+
+
+def add_timer_info_to_retentions(retentions_data: List[Retention]) -> None:
     """
     Add timer information to retentions
 
@@ -290,16 +510,12 @@ def add_timer_info_to_retentions(retentions_data: List[Dict]) -> None:
         retentions_data: List of retentions
     """
     for retention in retentions_data:
-        created_dt = None
-        if 'open_dt' in retention:
-            created_dt = retention['open_dt']
-        elif 'created_dt' in retention:
-            created_dt = retention['created_dt']
+        created_dt = retention.open_dt or retention.created_dt
 
         if created_dt:
             try:
                 # Convert date string to datetime object
-                created_datetime = datetime.fromisoformat(created_dt.replace('Z', '+00:00'))
+                created_datetime = parse_iso_datetime(created_dt)
 
                 # Calculate remaining time (120 hours from creation)
                 deadline = created_datetime + timedelta(hours=120)
@@ -312,30 +528,30 @@ def add_timer_info_to_retentions(retentions_data: List[Dict]) -> None:
                     minutes, seconds = divmod(remainder, 60)
 
                     # Add time information
-                    retention['remaining_hours'] = int(hours)
-                    retention['remaining_minutes'] = int(minutes)
-                    retention['remaining_seconds'] = int(seconds)
-                    retention['total_remaining_hours'] = round(remaining_time.total_seconds() / 3600, 1)
-                    retention['deadline_dt'] = deadline.isoformat()
+                    retention.remaining_hours = int(hours)
+                    retention.remaining_minutes = int(minutes)
+                    retention.remaining_seconds = int(seconds)
+                    retention.total_remaining_hours = round(remaining_time.total_seconds() / 3600, 1)
+                    retention.deadline_dt = deadline.isoformat()
                 else:
                     # Time expired
-                    retention['remaining_hours'] = 0
-                    retention['remaining_minutes'] = 0
-                    retention['remaining_seconds'] = 0
-                    retention['total_remaining_hours'] = 0
-                    retention['deadline_dt'] = deadline.isoformat()
-                    retention['time_expired'] = True
+                    retention.remaining_hours = 0
+                    retention.remaining_minutes = 0
+                    retention.remaining_seconds = 0
+                    retention.total_remaining_hours = 0
+                    retention.deadline_dt = deadline.isoformat()
+                    retention.time_expired = True
             except Exception as e:
                 logger.error(f"Error calculating time for retention: {e}")
-                retention['remaining_hours'] = None
-                retention['remaining_minutes'] = None
+                retention.remaining_hours = None
+                retention.remaining_minutes = None
         else:
             # No creation time info
-            retention['remaining_hours'] = None
-            retention['remaining_minutes'] = None
+            retention.remaining_hours = None
+            retention.remaining_minutes = None
 
 
-def get_retention_timers(token: str, supplier_id: str) -> List[Dict[str, Any]]:
+async def get_retention_timers(token: str, supplier_id: str) -> List[Retention]:
     """
     Get retention timers information
 
@@ -347,27 +563,41 @@ def get_retention_timers(token: str, supplier_id: str) -> List[Dict[str, Any]]:
         List of retentions with timer info or empty list
     """
     try:
-        logger.info(f"Getting retention timers data")
-
-        # Get retentions data
-        retentions_data = get_retentions_data(token, supplier_id)
+        retentions_data = await get_retentions_data_cached(token, supplier_id)
 
         if not retentions_data:
             logger.info("No retentions data available")
             return []
 
-        # Add timer information
         add_timer_info_to_retentions(retentions_data)
 
-        # Filter only active retentions (with time remaining)
-        active_retentions = [
-            r for r in retentions_data
-            if r.get('remaining_hours') is not None and not r.get('time_expired', False)
-        ]
-
-        return active_retentions
+        return _filter_active_retentions(retentions_data)
 
     except Exception as e:
         logger.error(f"Error getting retention timers: {e}")
         traceback.print_exc()
-        return []
\ No newline at end of file
+        return []
+
+
+async def get_retention_timers_many(pairs: List[Tuple[str, str]]) -> List[List[Retention]]:
+    """
+    Get retention timers for several accounts concurrently
+
+    Args:
+        pairs: List of (token, supplier_id) tuples
+
+    Returns:
+        List of timer lists in the same order as pairs
+    """
+    return await gather_with_concurrency(
+        ACCOUNTS_CONCURRENCY,
+        *(get_retention_timers(token, supplier_id) for token, supplier_id in pairs)
+    )
+
+
+def _filter_active_retentions(retentions_data: List[Retention]) -> List[Retention]:
+    """Filter only active retentions (with time remaining)"""
+    return [
+        r for r in retentions_data
+        if r.remaining_hours is not None and not r.time_expired
+    ]
\ No newline at end of file
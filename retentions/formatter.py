@@ -7,10 +7,20 @@ import traceback
 from datetime import datetime
 from typing import List, Dict, Any
 
+from utils.datetime_util import parse_iso_datetime
+from .api import Retention, TARE_STATUS_LOST
+
 logger = logging.getLogger(__name__)
 
 
-def format_retentions_report(data: List[Dict[str, Any]], account_name: str) -> str:
+def _remaining_sort_key(retention: Retention) -> float:
+    """Sort key by remaining time, retentions without timer go last"""
+    if retention.total_remaining_hours is None:
+        return float('inf')
+    return retention.total_remaining_hours
+
+
+def format_retentions_report(data: List[Retention], account_name: str) -> str:
     """
     Format retentions data into readable Telegram message
 
@@ -28,17 +38,21 @@ def format_retentions_report(data: List[Dict[str, Any]], account_name: str) -> s
         # Count general statistics
         total_waysheets = len(data)
 
-        # Count only LOST tares
-        total_tares = sum(
-            len([t for t in item.get('tares', []) if t.get('status') == 'TARE_STATUS_LOST'])
-            for item in data
-        )
-        total_lost_amount = sum(
-            t.get('price', 0)
-            for item in data
-            for t in item.get('tares', [])
-            if t.get('status') == 'TARE_STATUS_LOST'
-        )
+        # Collect waysheets with LOST tares and count totals in a single pass
+        total_tares = 0
+        total_lost_amount = 0
+        per_ws = []
+        for waysheet in data:
+            lost_tares = []
+            lost_amount = 0
+            for tare in waysheet.tares:
+                if tare.get('status') == TARE_STATUS_LOST:
+                    lost_tares.append(tare)
+                    lost_amount += tare.get('price') or 0
+            if lost_tares:
+                total_tares += len(lost_tares)
+                total_lost_amount += lost_amount
+                per_ws.append((waysheet, lost_tares, lost_amount))
 
         # Format main report text
         formatted_text = f"⚠️ *ОБНАРУЖЕНЫ УДЕРЖАНИЯ!* ⚠️\n"
@@ -54,35 +68,25 @@ def format_retentions_report(data: List[Dict[str, Any]], account_name: str) -> s
         # Detailed info about waysheets with retentions
         formatted_text += "💸 *Детали удержаний:*\n\n"
 
-        # Sort data by remaining time (ascending)
-        sorted_data = sorted(
-            data,
-            key=lambda x: x.get('total_remaining_hours', float('inf'))
-        )
-
-        for i, waysheet in enumerate(sorted_data, 1):
-            # Count only lost tares
-            lost_tares = [t for t in waysheet.get('tares', []) if t.get('status') == 'TARE_STATUS_LOST']
-            if not lost_tares:
-                continue  # Skip if no lost tares
-
-            lost_amount = sum(t.get('price', 0) for t in lost_tares)
+        # Sort waysheets with lost tares by remaining time (ascending)
+        per_ws.sort(key=lambda x: _remaining_sort_key(x[0]))
 
+        for i, (waysheet, lost_tares, lost_amount) in enumerate(per_ws, 1):
             formatted_text += f"*🔖 Путевой лист {i}:*\n"
 
             # Basic fields
-            if 'waysheet_id' in waysheet:
-                formatted_text += f"🆔 ID: {waysheet['waysheet_id']}\n"
+            if waysheet.waysheet_id is not None:
+                formatted_text += f"🆔 ID: {waysheet.waysheet_id}\n"
 
             # Timer info
-            if waysheet.get('remaining_hours') is not None:
-                hours = waysheet['remaining_hours']
-                minutes = waysheet['remaining_minutes']
+            if waysheet.remaining_hours is not None:
+                hours = waysheet.remaining_hours
+                minutes = waysheet.remaining_minutes
 
                 formatted_text += f"⏱ Осталось: *{hours} ч {minutes} мин*\n"
 
                 # Add warnings based on remaining time
-                if waysheet.get('time_expired', False):
+                if waysheet.time_expired:
                     formatted_text += "⚠️ *ВРЕМЯ ИСТЕКЛО!* Срочно обработайте удержание\n"
                 elif hours < 24:
                     formatted_text += "🚨 *СРОЧНО!* Менее 24 часов\n"
@@ -92,21 +96,21 @@ def format_retentions_report(data: List[Dict[str, Any]], account_name: str) -> s
                 formatted_text += "⏱ Таймер: Н/Д\n"
 
             # Source office
-            if 'src_office_name' in waysheet:
-                formatted_text += f"🏢 Офис отправления: {waysheet['src_office_name']}\n"
+            if waysheet.src_office_name is not None:
+                formatted_text += f"🏢 Офис отправления: {waysheet.src_office_name}\n"
 
             # Open date
-            if 'open_dt' in waysheet:
+            if waysheet.open_dt is not None:
                 try:
-                    dt = datetime.fromisoformat(waysheet['open_dt'].replace('Z', '+00:00'))
+                    dt = parse_iso_datetime(waysheet.open_dt)
                     formatted_date = dt.strftime('%d.%m.%Y %H:%M')
                     formatted_text += f"📅 Дата: {formatted_date}\n"
                 except:
-                    formatted_text += f"📅 Дата: {waysheet['open_dt']}\n"
+                    formatted_text += f"📅 Дата: {waysheet.open_dt}\n"
 
             # Add driver info if available
-            if 'driver_name' in waysheet and waysheet['driver_name'] != "Не найдено":
-                formatted_text += f"👨‍✈️ Водитель: {waysheet['driver_name']}\n"
+            if waysheet.driver_name is not None and waysheet.driver_name != "Не найдено":
+                formatted_text += f"👨‍✈️ Водитель: {waysheet.driver_name}\n"
 
             # Lost tares info
             formatted_text += f"❌ Потерянных тар: {len(lost_tares)}\n"
@@ -164,20 +168,17 @@ def format_timers_report(timers_by_account: List[Dict]) -> str:
             response += f"Всего удержаний: {total_retentions}\n\n"
 
             # Sort by remaining time (ascending)
-            sorted_timers = sorted(
-                account_info['timers'],
-                key=lambda x: x.get('total_remaining_hours', float('inf'))
-            )
+            sorted_timers = sorted(account_info['timers'], key=_remaining_sort_key)
 
             # Show up to 5 retentions with least remaining time
             for i, timer in enumerate(sorted_timers[:5], 1):
-                waysheet_id = timer.get('waysheet_id', 'Н/Д')
+                waysheet_id = timer.waysheet_id if timer.waysheet_id is not None else 'Н/Д'
                 response += f"⚠️ *Удержание {i}:*\n"
                 response += f"🆔 ID: {waysheet_id}\n"
 
-                if timer.get('remaining_hours') is not None:
-                    hours = timer['remaining_hours']
-                    minutes = timer['remaining_minutes']
+                if timer.remaining_hours is not None:
+                    hours = timer.remaining_hours
+                    minutes = timer.remaining_minutes
                     response += f"⏱ Осталось: *{hours} ч {minutes} мин*\n"
 
                     # Add emoji based on remaining time
@@ -191,12 +192,12 @@ def format_timers_report(timers_by_account: List[Dict]) -> str:
                     response += "⏱ Таймер: Н/Д\n"
 
                 # Source office
-                if 'src_office_name' in timer:
-                    response += f"🏢 Офис: {timer['src_office_name']}\n"
+                if timer.src_office_name is not None:
+                    response += f"🏢 Офис: {timer.src_office_name}\n"
 
                 # Add driver info if available
-                if 'driver_name' in timer and timer['driver_name'] != "Не найдено":
-                    response += f"👨‍✈️ Водитель: {timer['driver_name']}\n"
+                if timer.driver_name is not None and timer.driver_name != "Не найдено":
+                    response += f"👨‍✈️ Водитель: {timer.driver_name}\n"
 
                 response += "\n"
 
@@ -214,7 +215,7 @@ def format_timers_report(timers_by_account: List[Dict]) -> str:
         return f"🚫 Ошибка при форматировании таймеров: {str(e)}"
 
 
-def format_retention_summary(retention: Dict[str, Any]) -> str:
+def format_retention_summary(retention: Retention) -> str:
     """
     Format single retention summary for inline display
 
@@ -228,10 +229,10 @@ def format_retention_summary(retention: Dict[str, Any]) -> str:
         summary = []
 
         # Add timer if available
-        if retention.get('remaining_hours') is not None:
-            hours = retention['remaining_hours']
-            minutes = retention['remaining_minutes']
-            if retention.get('time_expired', False):
+        if retention.remaining_hours is not None:
+            hours = retention.remaining_hours
+            minutes = retention.remaining_minutes
+            if retention.time_expired:
                 summary.append("⚠️ ВРЕМЯ ИСТЕКЛО!")
             elif hours < 24:
                 summary.append(f"🚨 {hours}ч {minutes}м")
@@ -239,14 +240,18 @@ def format_retention_summary(retention: Dict[str, Any]) -> str:
                 summary.append(f"⏱ {hours}ч {minutes}м")
 
         # Add waysheet ID
-        if 'waysheet_id' in retention:
-            summary.append(f"ID: {retention['waysheet_id']}")
+        if retention.waysheet_id is not None:
+            summary.append(f"ID: {retention.waysheet_id}")
 
         # Add lost tares count
-        lost_tares = [t for t in retention.get('tares', []) if t.get('status') == 'TARE_STATUS_LOST']
-        if lost_tares:
-            lost_amount = sum(t.get('price', 0) for t in lost_tares)
-            summary.append(f"{len(lost_tares)} тар / {lost_amount}₽")
+        lost_count = 0
+        lost_amount = 0
+        for tare in retention.tares:
+            if tare.get('status') == TARE_STATUS_LOST:
+                lost_count += 1
+                lost_amount += tare.get('price') or 0
+        if lost_count:
+            summary.append(f"{lost_count} тар / {lost_amount}₽")
 
         return " | ".join(summary) if summary else "Нет данных"
 
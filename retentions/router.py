@@ -4,19 +4,24 @@ Router module for retentions functionality
 
 import logging
 import asyncio
+import time
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set
 
-from aiogram import Router, F
+from aiogram import Bot, Router, F
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.enums import ParseMode
 from aiogram.filters import Command
 
 from utils.config import accounts
+from utils.async_util import gather_with_concurrency
+from retentions.accounts import RetentionAccount, get_retention_account, get_retention_accounts
 from retentions.api import (
-    get_retentions_data,
+    ACCOUNTS_CONCURRENCY,
+    TARE_STATUS_LOST,
+    get_retentions_data_cached,
     merge_retentions_with_drivers,
-    get_retention_timers
+    get_retention_timers_many
 )
 from retentions.formatter import (
     format_retentions_report,
@@ -27,6 +32,26 @@ from retentions.formatter import (
 logger = logging.getLogger(__name__)
 router = Router(name="retentions")
 
+# Minimum interval between check all progress updates, seconds
+PROGRESS_UPDATE_INTERVAL = 1.0
+
+# Static keyboard parts, built once
+_TIMERS_BTN = InlineKeyboardButton(text="⏱ Показать таймеры", callback_data="retention_timers")
+_BACK_TO_MAIN_BTN = InlineKeyboardButton(text="⬅️ Назад в главное меню", callback_data="back_to_main")
+_CHECK_ALL_BTN = InlineKeyboardButton(text="🔍 Проверить все аккаунты", callback_data="retention_check_all")
+_TIMERS_ROW = [_TIMERS_BTN]
+_BACK_TO_MAIN_ROW = [_BACK_TO_MAIN_BTN]
+_BACK_TO_LIST_MARKUP = InlineKeyboardMarkup(inline_keyboard=[[
+    InlineKeyboardButton(text="⬅️ Назад к списку аккаунтов", callback_data="retentions_menu")
+]])
+
+# Per-user locks to avoid stacking reports on repeated presses
+_report_locks: Dict[int, asyncio.Lock] = {}
+# Number of report tasks holding or waiting for user's lock
+_report_lock_users: Dict[int, int] = {}
+# Strong references to running report tasks
+_background_tasks: Set[asyncio.Task] = set()
+
 
 async def get_retentions_keyboard(user_id: int) -> InlineKeyboardMarkup:
     """
@@ -41,40 +66,21 @@ async def get_retentions_keyboard(user_id: int) -> InlineKeyboardMarkup:
     buttons = []
 
     # Add buttons for each account with retentions capability
-    for account_id, account_data in accounts.items():
-        if account_data.get('retentions', {}).get('enabled'):
-            account_name = account_data['name']
-            buttons.append([
-                InlineKeyboardButton(
-                    text=f"📊 {account_name}",
-                    callback_data=f"retention_report_{account_id}"
-                )
-            ])
-
-    # Add check all button
-    if len(buttons) > 1:
+    for acc in get_retention_accounts():
         buttons.append([
             InlineKeyboardButton(
-                text="🔍 Проверить все аккаунты",
-                callback_data="retention_check_all"
+                text=f"📊 {acc.name}",
+                callback_data=f"retention_report_{acc.account_id}"
             )
         ])
 
-    # Add timers button
-    buttons.append([
-        InlineKeyboardButton(
-            text="⏱ Показать таймеры",
-            callback_data="retention_timers"
-        )
-    ])
+    # Add check all button
+    if len(buttons) > 1:
+        buttons.append([_CHECK_ALL_BTN])
 
-    # Add back button
-    buttons.append([
-        InlineKeyboardButton(
-            text="⬅️ Назад в главное меню",
-            callback_data="back_to_main"
-        )
-    ])
+    # Add timers and back buttons
+    buttons.append(_TIMERS_ROW)
+    buttons.append(_BACK_TO_MAIN_ROW)
 
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
@@ -121,40 +127,43 @@ async def callback_retentions_menu(callback: CallbackQuery):
         await callback.answer("Ошибка при открытии меню", show_alert=True)
 
 
-@router.callback_query(F.data.startswith("retention_report_"))
-async def callback_retention_report(callback: CallbackQuery):
-    """Handler for single account retention report"""
-    try:
-        await callback.answer("Загружаю данные об удержаниях...")
-        user_id = callback.from_user.id
-        message_id = callback.message.message_id
-
-        # Extract account ID from callback data
-        account_id = callback.data.replace("retention_report_", "")
-
-        if account_id not in accounts:
-            await callback.answer("Аккаунт не найден", show_alert=True)
-            return
-
-        account_data = accounts[account_id]
+async def _run_report(bot: Bot, user_id: int, message_id: int, acc: RetentionAccount) -> None:
+    """
+    Build report holding the user's report lock, lock is dropped once unused
 
-        # Check if retentions are enabled for this account
-        if not account_data.get('retentions', {}).get('enabled'):
-            await callback.answer("Удержания не настроены для этого аккаунта", show_alert=True)
-            return
+    Args:
+        bot: Bot instance
+        user_id: Telegram user ID
+        message_id: ID of the message to show progress in
+        acc: Retentions account
+    """
+    lock = _report_locks.setdefault(user_id, asyncio.Lock())
+    _report_lock_users[user_id] = _report_lock_users.get(user_id, 0) + 1
+    try:
+        async with lock:
+            await _send_report(bot, user_id, message_id, acc)
+    finally:
+        _report_lock_users[user_id] -= 1
+        if not _report_lock_users[user_id]:
+            del _report_lock_users[user_id]
+            del _report_locks[user_id]
 
-        retentions_config = account_data['retentions']
-        token = retentions_config.get('token')
-        supplier_id = retentions_config.get('supplier_id')
 
-        if not token or not supplier_id:
-            await callback.answer("Не настроен токен или supplier_id", show_alert=True)
-            return
+async def _send_report(bot: Bot, user_id: int, message_id: int, acc: RetentionAccount) -> None:
+    """
+    Build retentions report for single account and send it to user
 
-        account_name = account_data['name']
+    Args:
+        bot: Bot instance
+        user_id: Telegram user ID
+        message_id: ID of the message to show progress in
+        acc: Retentions account
+    """
+    try:
+        account_name = acc.name
 
         # Update message to show loading
-        await callback.bot.edit_message_text(
+        await bot.edit_message_text(
             chat_id=user_id,
             message_id=message_id,
             text=f"🔄 Загрузка данных об удержаниях для *{account_name}*...\n\n"
@@ -163,34 +172,21 @@ async def callback_retention_report(callback: CallbackQuery):
         )
 
         # Get retentions data
-        retentions_data = get_retentions_data(token, supplier_id)
+        retentions_data = await get_retentions_data_cached(acc.token, acc.supplier_id)
 
         if not retentions_data:
-            await callback.bot.edit_message_text(
+            await bot.edit_message_text(
                 chat_id=user_id,
                 message_id=message_id,
                 text=f"✅ *{account_name}*\n\n"
                      f"Удержания не найдены!",
-                parse_mode=ParseMode.MARKDOWN
-            )
-
-            # Add back button
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[[
-                InlineKeyboardButton(
-                    text="⬅️ Назад",
-                    callback_data="retentions_menu"
-                )
-            ]])
-
-            await callback.bot.edit_message_reply_markup(
-                chat_id=user_id,
-                message_id=message_id,
-                reply_markup=keyboard
+                parse_mode=ParseMode.MARKDOWN,
+                reply_markup=_BACK_TO_LIST_MARKUP
             )
             return
 
         # Update status - getting driver info
-        await callback.bot.edit_message_text(
+        await bot.edit_message_text(
             chat_id=user_id,
             message_id=message_id,
             text=f"🔄 Получение информации о водителях для *{account_name}*...\n\n"
@@ -199,39 +195,77 @@ async def callback_retention_report(callback: CallbackQuery):
         )
 
         # Merge with driver info
-        merged_retentions = merge_retentions_with_drivers(retentions_data, token)
+        merged_retentions = await merge_retentions_with_drivers(retentions_data, acc.token)
 
         # Format report
         formatted_text = format_retentions_report(merged_retentions, account_name)
 
         # Send formatted report as new message (too long for edit)
-        await callback.bot.send_message(
+        await bot.send_message(
             chat_id=user_id,
             text=formatted_text,
             parse_mode=ParseMode.MARKDOWN
         )
 
         # Update original message
-        await callback.bot.edit_message_text(
+        await bot.edit_message_text(
             chat_id=user_id,
             message_id=message_id,
             text=f"✅ Отчет об удержаниях для *{account_name}* отправлен выше",
-            parse_mode=ParseMode.MARKDOWN
+            parse_mode=ParseMode.MARKDOWN,
+            reply_markup=_BACK_TO_LIST_MARKUP
         )
 
-        # Add back button
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[[
-            InlineKeyboardButton(
-                text="⬅️ Назад к списку аккаунтов",
-                callback_data="retentions_menu"
+    except Exception as e:
+        logger.error(f"Error building retention report for user {user_id}: {e}")
+        try:
+            await bot.edit_message_text(
+                chat_id=user_id,
+                message_id=message_id,
+                text="🚫 Произошла ошибка при формировании отчета об удержаниях",
+                parse_mode=ParseMode.MARKDOWN,
+                reply_markup=_BACK_TO_LIST_MARKUP
             )
-        ]])
+        except Exception as edit_error:
+            logger.warning(f"Error showing retention report failure: {edit_error}")
 
-        await callback.bot.edit_message_reply_markup(
-            chat_id=user_id,
-            message_id=message_id,
-            reply_markup=keyboard
-        )
+
+@router.callback_query(F.data.startswith("retention_report_"))
+async def callback_retention_report(callback: CallbackQuery):
+    """Handler for single account retention report"""
+    try:
+        user_id = callback.from_user.id
+        message_id = callback.message.message_id
+
+        # Ignore repeated presses while report for this user is being built
+        lock = _report_locks.get(user_id)
+        if lock is not None and lock.locked():
+            await callback.answer("Отчет уже формируется, подождите...")
+            return
+
+        await callback.answer("Загружаю данные об удержаниях...")
+
+        # Extract account ID from callback data
+        account_id = callback.data.replace("retention_report_", "")
+
+        if account_id not in accounts:
+            await callback.answer("Аккаунт не найден", show_alert=True)
+            return
+
+        # Check if retentions are enabled for this account
+        acc = get_retention_account(account_id)
+        if acc is None:
+            await callback.answer("Удержания не настроены для этого аккаунта", show_alert=True)
+            return
+
+        if not acc.token or not acc.supplier_id:
+            await callback.answer("Не настроен токен или supplier_id", show_alert=True)
+            return
+
+        # Build report in background so the handler returns immediately
+        task = asyncio.create_task(_run_report(callback.bot, user_id, message_id, acc))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
 
     except Exception as e:
         logger.error(f"Error in retention report callback: {e}")
@@ -247,11 +281,7 @@ async def callback_retention_check_all(callback: CallbackQuery):
         message_id = callback.message.message_id
 
         # Get all accounts with retentions enabled
-        retention_accounts = [
-            (acc_id, acc_data)
-            for acc_id, acc_data in accounts.items()
-            if acc_data.get('retentions', {}).get('enabled')
-        ]
+        retention_accounts = get_retention_accounts()
 
         if not retention_accounts:
             await callback.answer("Нет аккаунтов с настроенными удержаниями", show_alert=True)
@@ -266,52 +296,70 @@ async def callback_retention_check_all(callback: CallbackQuery):
             parse_mode=ParseMode.MARKDOWN
         )
 
-        # Check each account
-        results = []
-        for i, (account_id, account_data) in enumerate(retention_accounts, 1):
-            account_name = account_data['name']
+        processed = 0
+        last_progress_update = time.monotonic()
 
-            # Update progress
-            await callback.bot.edit_message_text(
-                chat_id=user_id,
-                message_id=message_id,
-                text=f"🔄 Проверка удержаний...\n\n"
-                     f"Обработка: {account_name} ({i}/{len(retention_accounts)})",
-                parse_mode=ParseMode.MARKDOWN
-            )
+        async def _check(acc: RetentionAccount) -> str:
+            """Check single account and return its summary line"""
+            nonlocal processed, last_progress_update
+            account_name = acc.name
 
-            retentions_config = account_data['retentions']
-            token = retentions_config.get('token')
-            supplier_id = retentions_config.get('supplier_id')
-
-            if not token or not supplier_id:
-                results.append(f"❌ {account_name}: Не настроен")
-                continue
-
-            # Get retentions data
-            retentions_data = get_retentions_data(token, supplier_id)
-
-            if retentions_data:
-                # Count lost tares
-                total_lost = sum(
-                    len([t for t in item.get('tares', []) if t.get('status') == 'TARE_STATUS_LOST'])
-                    for item in retentions_data
-                )
-                total_amount = sum(
-                    t.get('price', 0)
-                    for item in retentions_data
-                    for t in item.get('tares', [])
-                    if t.get('status') == 'TARE_STATUS_LOST'
-                )
-
-                results.append(
-                    f"⚠️ *{account_name}*:\n"
-                    f"   • Путевых листов: {len(retentions_data)}\n"
-                    f"   • Потерянных тар: {total_lost}\n"
-                    f"   • Сумма: {total_amount} ₽"
-                )
+            if not acc.token or not acc.supplier_id:
+                result = f"❌ {account_name}: Не настроен"
             else:
-                results.append(f"✅ {account_name}: Удержаний нет")
+                # Get retentions data
+                retentions_data = await get_retentions_data_cached(acc.token, acc.supplier_id)
+
+                if retentions_data:
+                    # Count lost tares and their amount in a single pass
+                    total_lost = 0
+                    total_amount = 0
+                    for item in retentions_data:
+                        for tare in item.tares:
+                            if tare.get('status') == TARE_STATUS_LOST:
+                                total_lost += 1
+                                total_amount += tare.get('price') or 0
+
+                    result = (
+                        f"⚠️ *{account_name}*:\n"
+                        f"   • Путевых листов: {len(retentions_data)}\n"
+                        f"   • Потерянных тар: {total_lost}\n"
+                        f"   • Сумма: {total_amount} ₽"
+                    )
+                else:
+                    result = f"✅ {account_name}: Удержаний нет"
+
+            # Update progress at most once per PROGRESS_UPDATE_INTERVAL and after the last account
+            processed += 1
+            now = time.monotonic()
+            if now - last_progress_update > PROGRESS_UPDATE_INTERVAL or processed == len(retention_accounts):
+                last_progress_update = now
+                try:
+                    await callback.bot.edit_message_text(
+                        chat_id=user_id,
+                        message_id=message_id,
+                        text=f"🔄 Проверка удержаний...\n\n"
+                             f"Проверено: {account_name} ({processed}/{len(retention_accounts)})",
+                        parse_mode=ParseMode.MARKDOWN
+                    )
+                except Exception as e:
+                    logger.warning(f"Error updating check all progress: {e}")
+
+            return result
+
+        # Check all accounts concurrently
+        check_results = await gather_with_concurrency(
+            ACCOUNTS_CONCURRENCY,
+            *(_check(acc) for acc in retention_accounts),
+            return_exceptions=True
+        )
+
+        results = []
+        for acc, result in zip(retention_accounts, check_results):
+            if isinstance(result, Exception):
+                logger.error(f"Error checking retentions for {acc.account_id}: {result}")
+                result = f"❌ {acc.name}: Ошибка проверки"
+            results.append(result)
 
         # Format summary
         summary = "📊 *Сводка по всем аккаунтам:*\n\n" + "\n\n".join(results)
@@ -328,21 +376,8 @@ async def callback_retention_check_all(callback: CallbackQuery):
             chat_id=user_id,
             message_id=message_id,
             text="✅ Проверка всех аккаунтов завершена",
-            parse_mode=ParseMode.MARKDOWN
-        )
-
-        # Add back button
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[[
-            InlineKeyboardButton(
-                text="⬅️ Назад к списку аккаунтов",
-                callback_data="retentions_menu"
-            )
-        ]])
-
-        await callback.bot.edit_message_reply_markup(
-            chat_id=user_id,
-            message_id=message_id,
-            reply_markup=keyboard
+            parse_mode=ParseMode.MARKDOWN,
+            reply_markup=_BACK_TO_LIST_MARKUP
         )
 
     except Exception as e:
@@ -359,11 +394,7 @@ async def callback_retention_timers(callback: CallbackQuery):
         message_id = callback.message.message_id
 
         # Get all accounts with retentions enabled
-        retention_accounts = [
-            (acc_id, acc_data)
-            for acc_id, acc_data in accounts.items()
-            if acc_data.get('retentions', {}).get('enabled')
-        ]
+        retention_accounts = get_retention_accounts()
 
         if not retention_accounts:
             await callback.answer("Нет аккаунтов с настроенными удержаниями", show_alert=True)
@@ -377,28 +408,28 @@ async def callback_retention_timers(callback: CallbackQuery):
             parse_mode=ParseMode.MARKDOWN
         )
 
-        # Collect timers from all accounts
+        # Collect timers from all configured accounts concurrently
+        configured_accounts = [acc for acc in retention_accounts if acc.token and acc.supplier_id]
+        timers_by_account = await get_retention_timers_many([
+            (acc.token, acc.supplier_id) for acc in configured_accounts
+        ])
+
         all_timers = []
-        for account_id, account_data in retention_accounts:
-            retentions_config = account_data['retentions']
-            token = retentions_config.get('token')
-            supplier_id = retentions_config.get('supplier_id')
-
-            if token and supplier_id:
-                account_timers = get_retention_timers(token, supplier_id)
-                if account_timers:
-                    all_timers.append({
-                        'account_id': account_id,
-                        'account_name': account_data['name'],
-                        'timers': account_timers
-                    })
+        for acc, account_timers in zip(configured_accounts, timers_by_account):
+            if account_timers:
+                all_timers.append({
+                    'account_id': acc.account_id,
+                    'account_name': acc.name,
+                    'timers': account_timers
+                })
 
         if not all_timers:
             await callback.bot.edit_message_text(
                 chat_id=user_id,
                 message_id=message_id,
                 text="✅ Нет активных таймеров удержаний",
-                parse_mode=ParseMode.MARKDOWN
+                parse_mode=ParseMode.MARKDOWN,
+                reply_markup=_BACK_TO_LIST_MARKUP
             )
         else:
             # Format timers report
@@ -416,22 +447,9 @@ async def callback_retention_timers(callback: CallbackQuery):
                 chat_id=user_id,
                 message_id=message_id,
                 text="✅ Информация о таймерах отправлена выше",
-                parse_mode=ParseMode.MARKDOWN
-            )
-
-        # Add back button
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[[
-            InlineKeyboardButton(
-                text="⬅️ Назад к списку аккаунтов",
-                callback_data="retentions_menu"
+                parse_mode=ParseMode.MARKDOWN,
+                reply_markup=_BACK_TO_LIST_MARKUP
             )
-        ]])
-
-        await callback.bot.edit_message_reply_markup(
-            chat_id=user_id,
-            message_id=message_id,
-            reply_markup=keyboard
-        )
 
     except Exception as e:
         logger.error(f"Error in timers callback: {e}")
@@ -448,49 +466,47 @@ async def check_retentions_scheduled():
         logger.info("Starting scheduled retentions check")
 
         # Get all accounts with retentions enabled
-        retention_accounts = [
-            (acc_id, acc_data)
-            for acc_id, acc_data in accounts.items()
-            if acc_data.get('retentions', {}).get('enabled')
-        ]
+        retention_accounts = get_retention_accounts()
 
         if not retention_accounts:
             logger.info("No accounts with retentions configured")
             return []
 
-        results = []
-        for account_id, account_data in retention_accounts:
+        async def _check(acc: RetentionAccount) -> Optional[Dict[str, Any]]:
+            """Check single account, return its retentions or None"""
             try:
-                retentions_config = account_data['retentions']
-                token = retentions_config.get('token')
-                supplier_id = retentions_config.get('supplier_id')
-
-                if not token or not supplier_id:
-                    logger.warning(f"Account {account_id} missing token or supplier_id")
-                    continue
+                if not acc.token or not acc.supplier_id:
+                    logger.warning(f"Account {acc.account_id} missing token or supplier_id")
+                    return None
 
                 # Get retentions data
-                retentions_data = get_retentions_data(token, supplier_id)
+                retentions_data = await get_retentions_data_cached(acc.token, acc.supplier_id)
 
                 if retentions_data:
                     # Merge with driver info
-                    merged_retentions = merge_retentions_with_drivers(retentions_data, token)
+                    merged_retentions = await merge_retentions_with_drivers(retentions_data, acc.token)
+
+                    logger.info(f"Found {len(retentions_data)} retentions for {acc.account_id}")
 
-                    results.append({
-                        'account_id': account_id,
-                        'account_name': account_data['name'],
+                    return {
+                        'account_id': acc.account_id,
+                        'account_name': acc.name,
                         'retentions': merged_retentions
-                    })
+                    }
 
-                    logger.info(f"Found {len(retentions_data)} retentions for {account_id}")
-                else:
-                    logger.info(f"No retentions found for {account_id}")
+                logger.info(f"No retentions found for {acc.account_id}")
+                return None
 
             except Exception as e:
-                logger.error(f"Error checking retentions for {account_id}: {e}")
-                continue
+                logger.error(f"Error checking retentions for {acc.account_id}: {e}")
+                return None
+
+        results = await gather_with_concurrency(
+            ACCOUNTS_CONCURRENCY,
+            *(_check(acc) for acc in retention_accounts)
+        )
 
-        return results
+        return [result for result in results if result]
 
     except Exception as e:
         logger.error(f"Error in scheduled retentions check: {e}")
@@ -3,15 +3,67 @@ Scheduler functions for retentions monitoring
 """
 
 import logging
-from typing import List, Dict, Any
+from typing import List, Optional, Tuple
 from aiogram import Bot
 
-from utils.config import accounts, RETENTIONS_GROUP, RETENTIONS_TOPIC_ID
-from .api import get_retentions_data, merge_retentions_with_drivers
+from utils.config import RETENTIONS_GROUP, RETENTIONS_TOPIC_ID
+from utils.async_util import gather_with_concurrency
+from .accounts import RetentionAccount, get_retention_accounts
+from .api import (
+    ACCOUNTS_CONCURRENCY,
+    Retention,
+    get_retentions_data,
+    merge_retentions_with_drivers
+)
 from .formatter import format_retentions_report
 
 logger = logging.getLogger(__name__)
 
+# Retentions with less time left are alerted separately
+CRITICAL_REMAINING_HOURS = 24
+
+
+async def _fetch_account_retentions(acc: RetentionAccount) -> Optional[Tuple[List[Retention], List[Retention]]]:
+    """
+    Get retentions merged with driver info for single account
+
+    Args:
+        acc: Retentions account
+
+    Returns:
+        Tuple of (merged retentions, critical retentions) or None if nothing found
+    """
+    try:
+        if not acc.token or not acc.supplier_id:
+            logger.warning(f"Account {acc.account_id} missing token or supplier_id for retentions")
+            return None
+
+        account_name = acc.name
+        logger.info(f"Checking retentions for {account_name}")
+
+        # Get retentions data
+        retentions_data = await get_retentions_data(acc.token, acc.supplier_id)
+
+        if not retentions_data:
+            logger.info(f"No retentions found for {account_name}")
+            return None
+
+        logger.info(f"Found {len(retentions_data)} retentions for {account_name}")
+
+        # Merge with driver info and pick critical retentions in the same pass
+        merged, critical = [], []
+        for retention in await merge_retentions_with_drivers(retentions_data, acc.token):
+            merged.append(retention)
+            remaining_hours = retention.remaining_hours
+            if remaining_hours is not None and remaining_hours < CRITICAL_REMAINING_HOURS:
+                critical.append(retention)
+
+        return merged, critical
+
+    except Exception as e:
+        logger.error(f"Error checking retentions for {acc.account_id}: {e}", exc_info=True)
+        return None
+
 
 async def send_retentions_alerts(bot: Bot):
     """
@@ -25,72 +77,57 @@ async def send_retentions_alerts(bot: Bot):
         return
 
     # Check all accounts with retentions enabled
-    for account_id, account_data in accounts.items():
-        if not account_data.get('retentions', {}).get('enabled'):
+    retention_accounts = get_retention_accounts()
+
+    # Fetch concurrently, send in account order
+    results = await gather_with_concurrency(
+        ACCOUNTS_CONCURRENCY,
+        *(_fetch_account_retentions(acc) for acc in retention_accounts)
+    )
+
+    for acc, result in zip(retention_accounts, results):
+        if not result or not result[0]:
             continue
 
+        merged_retentions, critical_retentions = result
+
         try:
-            retentions_config = account_data['retentions']
-            token = retentions_config.get('token')
-            supplier_id = retentions_config.get('supplier_id')
-
-            if not token or not supplier_id:
-                logger.warning(f"Account {account_id} missing token or supplier_id for retentions")
-                continue
-
-            account_name = account_data['name']
-            logger.info(f"Checking retentions for {account_name}")
-
-            # Get retentions data
-            retentions_data = get_retentions_data(token, supplier_id)
-
-            if retentions_data:
-                logger.info(f"Found {len(retentions_data)} retentions for {account_name}")
-
-                # Merge with driver info
-                merged_retentions = merge_retentions_with_drivers(retentions_data, token)
-
-                # Check for critical retentions (less than 24 hours)
-                critical_retentions = [
-                    r for r in merged_retentions
-                    if r.get('remaining_hours') is not None and r['remaining_hours'] < 24
-                ]
-
-                # Format and send report
-                if merged_retentions:
-                    formatted_text = format_retentions_report(merged_retentions, account_name)
-
-                    # Send to group with topic if configured
-                    if RETENTIONS_TOPIC_ID and RETENTIONS_TOPIC_ID > 1:
-                        await bot.send_message(
-                            chat_id=RETENTIONS_GROUP,
-                            text=formatted_text,
-                            parse_mode="Markdown",
-                            message_thread_id=RETENTIONS_TOPIC_ID
-                        )
-                    else:
-                        await bot.send_message(
-                            chat_id=RETENTIONS_GROUP,
-                            text=formatted_text,
-                            parse_mode="Markdown"
-                        )
-
-                    logger.info(f"Sent retentions report for {account_name} to group")
-
-                    # Additional alert for critical retentions
-                    if critical_retentions:
-                        alert_text = f"🚨 *СРОЧНО!* 🚨\n\n"
-                        alert_text += f"Для аккаунта *{account_name}* обнаружено "
-                        alert_text += f"*{len(critical_retentions)}* удержаний с критическим сроком (< 24 часов)!\n\n"
-                        alert_text += "Требуется срочное вмешательство!"
-
-                        await bot.send_message(
-                            chat_id=RETENTIONS_GROUP,
-                            text=alert_text,
-                            parse_mode="Markdown"
-                        )
+            account_name = acc.name
+
+            # Format and send report
+            formatted_text = format_retentions_report(merged_retentions, account_name)
+
+            # Send to group with topic if configured
+            if RETENTIONS_TOPIC_ID and RETENTIONS_TOPIC_ID > 1:
+                await bot.send_message(
+                    chat_id=RETENTIONS_GROUP,
+                    text=formatted_text,
+                    parse_mode="Markdown",
+                    message_thread_id=RETENTIONS_TOPIC_ID
+                )
             else:
-                logger.info(f"No retentions found for {account_name}")
+                await bot.send_message(
+                    chat_id=RETENTIONS_GROUP,
+                    text=formatted_text,
+                    parse_mode="Markdown"
+                )
+
+            logger.info(f"Sent retentions report for {account_name} to group")
+
+            # Additional alert for critical retentions
+            if critical_retentions:
+                alert_text = "".join((
+                    "🚨 *СРОЧНО!* 🚨\n\n",
+                    f"Для аккаунта *{account_name}* обнаружено ",
+                    f"*{len(critical_retentions)}* удержаний с критическим сроком (< 24 часов)!\n\n",
+                    "Требуется срочное вмешательство!"
+                ))
+
+                await bot.send_message(
+                    chat_id=RETENTIONS_GROUP,
+                    text=alert_text,
+                    parse_mode="Markdown"
+                )
 
         except Exception as e:
-            logger.error(f"Error checking retentions for {account_id}: {e}", exc_info=True)
\ No newline at end of file
+            logger.error(f"Error sending retentions alert for {acc.account_id}: {e}", exc_info=True)
@@ -2,14 +2,25 @@
 API client for Shipment module
 Handles API requests to WB Logistics for shipment monitoring
 """
+import base64
 import logging
+import random
 import time
 import json
 import aiohttp
 import asyncio
-from typing import Dict, List, Any, Optional, Tuple
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 
+from utils.config import AccountConfig
+
+try:
+    # Faster JSON decoder for large shipment payloads
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -19,10 +30,104 @@ AUTH_ENDPOINT = "/news-feed-api/public/v2/feed/status"
 SHIPMENTS_ENDPOINT = "/shipments-service/api/v1/shipments"
 TRANSFER_BOXES_ENDPOINT = "/logistics-api/api/v1/transfer-boxes/in-transfer"
 
+# Constant request headers, Authorization is added per request
+_BASE_HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json, text/plain, */*",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36",
+    "Origin": "https://logistics.wildberries.ru",
+    "Referer": "https://logistics.wildberries.ru/",
+    "sec-ch-ua": '"Not A(Brand";v="8", "Chromium";v="132", "Google Chrome";v="132"',
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": '"Windows"',
+    "Sec-Fetch-Dest": "empty",
+    "Sec-Fetch-Mode": "cors",
+    "Sec-Fetch-Site": "cross-site"
+}
+_JSON_HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json"
+}
+
+# Maximum number of office_id requests in flight per account
+OFFICES_CONCURRENCY = 8
+
+# Returned by get_with_retry when server answers 304 Not Modified
+NOT_MODIFIED = object()
+
+# Retry backoff settings, seconds
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30
+
+# Re-authenticate this many seconds before bearer token expires
+TOKEN_REFRESH_MARGIN = 60
+
+# Seconds before retrying authentication when configured token is already expired
+TOKEN_EXPIRED_BACKOFF = 3600
+
+# Shared HTTP session for all monitored accounts, created on first use
+_session: Optional[aiohttp.ClientSession] = None
+
+async def get_session() -> aiohttp.ClientSession:
+    """
+    Get shared aiohttp session for WB Logistics API requests
+
+    Returns:
+        Open aiohttp session with keep-alive connection pool
+    """
+    global _session
+
+    if _session is None or _session.closed:
+        # All accounts poll the same host, so one pool serves every account
+        connector = aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=64,
+            ttl_dns_cache=300,
+            keepalive_timeout=75
+        )
+        # Bearer auth only, cookies must not leak between accounts
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            cookie_jar=aiohttp.DummyCookieJar(),
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
+
+    return _session
+
+async def close_session() -> None:
+    """Close shared aiohttp session on shutdown"""
+    global _session
+
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+def _backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """
+    Get delay before next retry attempt
+
+    Uses Retry-After header value when present, otherwise full-jitter
+    exponential backoff to avoid synchronized retries of all loops
+
+    Args:
+        attempt: Number of the failed attempt, starting from 0
+        retry_after: Retry-After header value
+
+    Returns:
+        Delay in seconds
+    """
+    if retry_after:
+        try:
+            return min(BACKOFF_CAP, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
 async def get_with_retry(session: aiohttp.ClientSession, url: str, headers: Dict,
-                         params: Dict = None, max_attempts: int = 5) -> Optional[Dict]:
+                         params: Dict = None, max_attempts: int = 5,
+                         validators: Optional[Dict[str, Optional[str]]] = None) -> Any:
     """
-    Send GET request with retry and exponential backoff
+    Send GET request with retry and jittered exponential backoff
 
     Args:
         session: aiohttp session
@@ -30,33 +135,77 @@ async def get_with_retry(session: aiohttp.ClientSession, url: str, headers: Dict
         headers: Request headers
         params: Request parameters
         max_attempts: Maximum number of retry attempts
+        validators: Dict filled with ETag and Last-Modified of successful response
 
     Returns:
-        Response data or None on error
+        Response data, NOT_MODIFIED for 304 response or None on error
     """
     attempt = 0
     while attempt < max_attempts:
         try:
             async with session.get(url, headers=headers, params=params, timeout=30) as response:
                 if response.status == 200:
-                    return await response.json()
+                    if validators is not None:
+                        validators['etag'] = response.headers.get('ETag')
+                        validators['last_modified'] = response.headers.get('Last-Modified')
+                    return await response.json(loads=_json_loads)
+                elif response.status == 304:
+                    return NOT_MODIFIED
                 elif response.status == 401 or response.status == 403:
                     # Authentication error, token expired
                     logger.error(f"Authentication error: {response.status}. Token expired.")
                     return None
                 else:
-                    logger.warning(f"API error: {response.status}. Attempt {attempt+1}/{max_attempts}")
-                    # Exponential backoff
-                    await asyncio.sleep(2 ** attempt)
+                    logger.warning("API error: %s. Attempt %s/%s", response.status, attempt+1, max_attempts)
+                    # Exponential backoff with jitter
+                    await asyncio.sleep(_backoff_delay(attempt, response.headers.get('Retry-After')))
                     attempt += 1
         except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-            logger.error(f"Request error: {e}. Attempt {attempt+1}/{max_attempts}")
-            await asyncio.sleep(2 ** attempt)
+            logger.error("Request error: %s. Attempt %s/%s", e, attempt+1, max_attempts)
+            await asyncio.sleep(_backoff_delay(attempt))
             attempt += 1
 
-    logger.error(f"Failed to get {url} after {max_attempts} attempts")
+    logger.error("Failed to get %s after %s attempts", url, max_attempts)
     return None
 
+def _decode_token_exp(token: str) -> Optional[float]:
+    """
+    Read exp claim of JWT bearer token without verifying signature
+
+    Args:
+        token: Bearer token
+
+    Returns:
+        Expiry as epoch seconds or None if token is not a JWT with exp
+    """
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get('exp')
+        return float(exp) if exp is not None else None
+    except (IndexError, ValueError, TypeError, AttributeError):
+        return None
+
+def token_needs_refresh(account_data: AccountConfig) -> bool:
+    """
+    Check if bearer token of account expires within TOKEN_REFRESH_MARGIN
+
+    Tokens without exp claim are never refreshed ahead of time. Authentication
+    reloads the static token from config, so once it is found expired after a
+    refresh, the next attempt waits TOKEN_EXPIRED_BACKOFF
+
+    Args:
+        account_data: Account data
+
+    Returns:
+        True if account should re-authenticate
+    """
+    state = account_data.shipment
+    token_exp = state.token_exp
+    if token_exp is None or time.monotonic() < state.token_retry_at:
+        return False
+    return time.time() + TOKEN_REFRESH_MARGIN >= token_exp
+
 async def authenticate(session: aiohttp.ClientSession, account_id: str) -> Tuple[bool, str]:
     """
     Authenticate with WB Logistics API and get bearer token
@@ -77,29 +226,22 @@ async def authenticate(session: aiohttp.ClientSession, account_id: str) -> Tuple
 
     try:
         # Use the token from config as bearer token
-        token = account_data.get('shipment', {}).get('token')
+        state = account_data.shipment
+        token = state.token if state else None
         if not token:
             logger.error(f"No token configured for account {account_id}")
             return False, "No token configured"
 
-        account_data['shipment']['bearer_token'] = token
+        state.bearer_token = token
+        state.token_exp = _decode_token_exp(token)
+        if state.token_exp is not None and time.time() + TOKEN_REFRESH_MARGIN >= state.token_exp:
+            # Reloading the same token will not help until config is updated
+            logger.error(f"Configured shipment token for account {account_id} is expired, update .env")
+            state.token_retry_at = time.monotonic() + TOKEN_EXPIRED_BACKOFF
 
         # Verify token with test request
         url = f"{API_BASE_URL}{AUTH_ENDPOINT}"
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json, text/plain, */*",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36",
-            "Origin": "https://logistics.wildberries.ru",
-            "Referer": "https://logistics.wildberries.ru/",
-            "sec-ch-ua": '"Not A(Brand";v="8", "Chromium";v="132", "Google Chrome";v="132"',
-            "sec-ch-ua-mobile": "?0",
-            "sec-ch-ua-platform": '"Windows"',
-            "Sec-Fetch-Dest": "empty",
-            "Sec-Fetch-Mode": "cors",
-            "Sec-Fetch-Site": "cross-site"
-        }
+        headers = {**_BASE_HEADERS, "Authorization": f"Bearer {token}"}
 
         logger.info(f"Authenticating account {account_id} with WB API")
         async with session.get(url, headers=headers, timeout=10) as response:
@@ -113,24 +255,65 @@ async def authenticate(session: aiohttp.ClientSession, account_id: str) -> Tuple
         logger.error(f"Authentication error for account {account_id}: {e}")
         return False, f"Request error: {e}"
 
-async def get_shipments(session: aiohttp.ClientSession, account_id: str, account_data: Dict) -> Optional[List[Dict]]:
+def _extract_office_shipments(response_data: Any, office_id: Any) -> List[Dict]:
     """
-    Get active shipments from WB Logistics API
+    Extract shipments from office response and normalize their IDs
+
+    Args:
+        response_data: Shipments API response
+        office_id: Office ID used for the request
+
+    Returns:
+        List of shipments
+    """
+    # Extract shipments from response
+    shipments_data = []
+    if isinstance(response_data, dict) and "data" in response_data:
+        shipments_data = response_data["data"]
+    elif isinstance(response_data, list):
+        shipments_data = response_data
+
+    shipments = []
+
+    # Process each shipment
+    for shipment in shipments_data:
+        if isinstance(shipment, dict):
+            # Ensure ID field exists
+            if "id" not in shipment or shipment["id"] is None:
+                # Try to find ID in other fields
+                if "_id" in shipment:
+                    shipment["id"] = shipment["_id"]
+                elif "shipment_id" in shipment:
+                    shipment["id"] = shipment["shipment_id"]
+
+            # Add office_id tracking information
+            shipment["src_office_id_used"] = office_id
+            shipments.append(shipment)
+
+    return shipments
+
+async def iter_shipments(session: aiohttp.ClientSession, account_id: str,
+                         account_data: AccountConfig) -> AsyncIterator[Tuple[Any, List[Dict]]]:
+    """
+    Get active shipments from WB Logistics API office by office
+
+    Requests for all office_ids run concurrently, results are yielded
+    as soon as each office responds
 
     Args:
         session: aiohttp session
         account_id: Account ID
         account_data: Account data
 
-    Returns:
-        List of shipments or None on error
+    Yields:
+        Tuples of (office_id, shipments)
     """
     # Ensure we have bearer token
-    if not account_data.get('shipment', {}).get('bearer_token'):
+    if not account_data.shipment.bearer_token:
         auth_success, auth_message = await authenticate(session, account_id)
         if not auth_success:
             logger.error(f"Failed to authenticate account {account_id}: {auth_message}")
-            return None
+            return
 
     # Set date range (last 3 days)
     now = datetime.now()
@@ -138,90 +321,97 @@ async def get_shipments(session: aiohttp.ClientSession, account_id: str, account
     end_date = now.strftime("%Y-%m-%d")
 
     url = f"{API_BASE_URL}{SHIPMENTS_ENDPOINT}"
-    headers = {
-        "Authorization": f"Bearer {account_data['shipment']['bearer_token']}",
-        "Content-Type": "application/json",
-        "Accept": "application/json, text/plain, */*",
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36",
-        "Origin": "https://logistics.wildberries.ru",
-        "Referer": "https://logistics.wildberries.ru/",
-        "sec-ch-ua": '"Not A(Brand";v="8", "Chromium";v="132", "Google Chrome";v="132"',
-        "sec-ch-ua-mobile": "?0",
-        "sec-ch-ua-platform": '"Windows"',
-        "Sec-Fetch-Dest": "empty",
-        "Sec-Fetch-Mode": "cors",
-        "Sec-Fetch-Site": "cross-site"
-    }
+    headers = {**_BASE_HEADERS, "Authorization": f"Bearer {account_data.shipment.bearer_token}"}
 
     # Get office_ids list
-    office_ids = account_data.get('shipment', {}).get('office_ids', [])
+    office_ids = account_data.shipment.office_ids
     if not office_ids:
         logger.error(f"No office_ids configured for account {account_id}")
-        return []
+        return
 
     # Get supplier_id
-    supplier_id = account_data.get('shipment', {}).get('supplier_id')
+    supplier_id = account_data.shipment.supplier_id
     if not supplier_id:
         logger.error(f"No supplier_id configured for account {account_id}")
-        return []
+        return
+
+    # Get shipments for all office_ids concurrently
+    logger.info("Getting active shipments for account %s", account_id)
+
+    base_params = {
+        "dt_start": start_date,
+        "dt_end": end_date,
+        "page_index": 0,
+        "limit": 50,
+        "supplier_id": supplier_id,
+        "show_only_open": "true",
+        "direction": -1,
+        "sorter": "updated_at"
+    }
+
+    semaphore = asyncio.Semaphore(OFFICES_CONCURRENCY)
+
+    async def fetch_office(office_id: Any) -> Tuple[Any, Any]:
+        async with semaphore:
+            try:
+                return office_id, await get_with_retry(
+                    session, url, headers, {**base_params, "src_office_id": office_id}
+                )
+            except Exception as e:
+                logger.warning("Error getting shipments for office_id %s: %s", office_id, e)
+                return office_id, None
+
+    tasks = [asyncio.ensure_future(fetch_office(office_id)) for office_id in office_ids]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            office_id, response_data = await next_done
 
+            if not response_data:
+                logger.warning("Failed to get shipments for office_id %s", office_id)
+                continue
+
+            shipments = _extract_office_shipments(response_data, office_id)
+            if shipments:
+                logger.info("Got %s shipments for office_id %s", len(shipments), office_id)
+
+            yield office_id, shipments
+    finally:
+        # Consumer stopped early or was cancelled
+        for task in tasks:
+            task.cancel()
+
+async def get_shipments(session: aiohttp.ClientSession, account_id: str, account_data: AccountConfig) -> Optional[List[Dict]]:
+    """
+    Get active shipments from WB Logistics API
+
+    Args:
+        session: aiohttp session
+        account_id: Account ID
+        account_data: Account data
+
+    Returns:
+        List of shipments
+    """
     all_shipments = []
+    async for _, shipments in iter_shipments(session, account_id, account_data):
+        all_shipments.extend(shipments)
+
+    logger.info("Total %s shipments for account %s", len(all_shipments), account_id)
+    return all_shipments
+
+# (token, shipment_id) -> (ETag, Last-Modified, details) of last successful fetch
+_details_meta: Dict[Tuple[str, int], Tuple[Optional[str], Optional[str], Dict]] = {}
 
-    # Get shipments for each office_id
-    logger.info(f"Getting active shipments for account {account_id}")
-
-    for office_id in office_ids:
-        params = {
-            "dt_start": start_date,
-            "dt_end": end_date,
-            "src_office_id": office_id,
-            "page_index": 0,
-            "limit": 50,
-            "supplier_id": supplier_id,
-            "show_only_open": "true",
-            "direction": -1,
-            "sorter": "updated_at"
-        }
-
-        response_data = await get_with_retry(session, url, headers, params)
-
-        if not response_data:
-            logger.warning(f"Failed to get shipments for office_id {office_id}")
-            continue
-
-        # Extract shipments from response
-        shipments_data = []
-        if isinstance(response_data, dict) and "data" in response_data:
-            shipments_data = response_data["data"]
-        elif isinstance(response_data, list):
-            shipments_data = response_data
-
-        # Process each shipment
-        for shipment in shipments_data:
-            if isinstance(shipment, dict):
-                # Ensure ID field exists
-                if "id" not in shipment or shipment["id"] is None:
-                    # Try to find ID in other fields
-                    if "_id" in shipment:
-                        shipment["id"] = shipment["_id"]
-                    elif "shipment_id" in shipment:
-                        shipment["id"] = shipment["shipment_id"]
-
-                # Add office_id tracking information
-                shipment["src_office_id_used"] = office_id
-                all_shipments.append(shipment)
-
-        if shipments_data:
-            logger.info(f"Got {len(shipments_data)} shipments for office_id {office_id}")
-
-    logger.info(f"Total {len(all_shipments)} shipments for account {account_id}")
-    return all_shipments if all_shipments else []
-
-async def get_shipment_details(session: aiohttp.ClientSession, account_data: Dict,
+# (token, shipment_id) -> details request in progress
+_inflight_details: Dict[Tuple[str, int], "asyncio.Future[Optional[Dict]]"] = {}
+
+async def get_shipment_details(session: aiohttp.ClientSession, account_data: AccountConfig,
                                shipment_id: int) -> Optional[Dict]:
     """
     Get detailed information about a specific shipment
 
+    Concurrent calls for the same shipment share a single request
+
     Args:
         session: aiohttp session
         account_data: Account data
@@ -230,23 +420,100 @@ async def get_shipment_details(session: aiohttp.ClientSession, account_data: Dic
     Returns:
         Shipment details or None on error
     """
-    url = f"{API_BASE_URL}{SHIPMENTS_ENDPOINT}/{shipment_id}"
-    headers = {
-        "Authorization": f"Bearer {account_data['shipment']['bearer_token']}",
-        "Content-Type": "application/json",
-        "Accept": "application/json"
-    }
+    key = (account_data.shipment.bearer_token, shipment_id)
+
+    # No await between lookup and insert, so no lock is needed
+    future = _inflight_details.get(key)
+    if future is not None:
+        logger.debug("Waiting for in-flight details request for shipment %s", shipment_id)
+        return await asyncio.shield(future)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight_details[key] = future
+    try:
+        result = await _fetch_shipment_details(session, account_data, shipment_id)
+    except BaseException as e:
+        future.set_exception(e)
+        # Mark exception as retrieved if nobody else is waiting
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        del _inflight_details[key]
+
+async def _fetch_shipment_details(session: aiohttp.ClientSession, account_data: AccountConfig,
+                                 shipment_id: int) -> Optional[Dict]:
+    """
+    Request detailed information about a specific shipment from API
+
+    Args:
+        session: aiohttp session
+        account_data: Account data
+        shipment_id: Shipment ID
 
-    logger.info(f"Getting details for shipment {shipment_id}")
-    response_data = await get_with_retry(session, url, headers)
+    Returns:
+        Shipment details or None on error
+    """
+    url = f"{API_BASE_URL}{SHIPMENTS_ENDPOINT}/{shipment_id}"
+    token = account_data.shipment.bearer_token
+    headers = {**_JSON_HEADERS, "Authorization": f"Bearer {token}"}
+    key = (token, shipment_id)
+
+    # Ask server to skip body if shipment did not change since last fetch
+    cached = _details_meta.get(key)
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    logger.info("Getting details for shipment %s", shipment_id)
+    validators = {}
+    response_data = await get_with_retry(session, url, headers, validators=validators)
+
+    if response_data is NOT_MODIFIED:
+        if cached:
+            logger.debug("Shipment %s not modified, using cached details", shipment_id)
+            return cached[2]
+        logger.error("Unexpected 304 for shipment %s without cached details", shipment_id)
+        return None
 
     if not response_data:
-        logger.error(f"Failed to get details for shipment {shipment_id}")
+        logger.error("Failed to get details for shipment %s", shipment_id)
         return None
 
+    if validators.get('etag') or validators.get('last_modified'):
+        _details_meta[key] = (validators['etag'], validators['last_modified'], response_data)
+    else:
+        _details_meta.pop(key, None)
+
     return response_data
 
-async def get_transfer_boxes(session: aiohttp.ClientSession, account_data: Dict,
+def forget_shipment_details(account_data: AccountConfig, shipment_id: int) -> None:
+    """
+    Drop cached details of shipment that is no longer monitored
+
+    Args:
+        account_data: Account data
+        shipment_id: Shipment ID
+    """
+    _details_meta.pop((account_data.shipment.bearer_token, shipment_id), None)
+
+def forget_account_details(account_data: AccountConfig) -> None:
+    """
+    Drop cached details of all shipments of account when its monitoring stops
+
+    Args:
+        account_data: Account data
+    """
+    token = account_data.shipment.bearer_token
+    for key in [key for key in _details_meta if key[0] == token]:
+        del _details_meta[key]
+
+async def get_transfer_boxes(session: aiohttp.ClientSession, account_data: AccountConfig,
                              transfer_id: int) -> Optional[List[Dict]]:
     """
     Get information about boxes in a transfer
@@ -260,25 +527,21 @@ async def get_transfer_boxes(session: aiohttp.ClientSession, account_data: Dict,
         List of transfer boxes or None on error
     """
     url = f"{API_BASE_URL}{TRANSFER_BOXES_ENDPOINT}"
-    headers = {
-        "Authorization": f"Bearer {account_data['shipment']['bearer_token']}",
-        "Content-Type": "application/json",
-        "Accept": "application/json"
-    }
+    headers = {**_JSON_HEADERS, "Authorization": f"Bearer {account_data.shipment.bearer_token}"}
 
     params = {
         "transfer_id": transfer_id
     }
 
-    logger.info(f"Getting boxes for transfer {transfer_id}")
+    logger.info("Getting boxes for transfer %s", transfer_id)
     response_data = await get_with_retry(session, url, headers, params)
 
     if not response_data:
-        logger.error(f"Failed to get boxes for transfer {transfer_id}")
+        logger.error("Failed to get boxes for transfer %s", transfer_id)
         return None
 
     # Extract boxes from response
     boxes = response_data.get('data', [])
-    logger.info(f"Got {len(boxes)} boxes for transfer {transfer_id}")
+    logger.info("Got %s boxes for transfer %s", len(boxes), transfer_id)
 
     return boxes
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+Micro-batcher for Telegram message edits
+Coalesces edits of the same message within a short window so bursts of button
+presses collapse into one API call with the latest state
+"""
+import logging
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.types import InlineKeyboardMarkup
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Flush batch when this many messages are pending
+MAX_BATCH_SIZE = 16
+
+# Flush batch at most this long after the first pending edit, milliseconds
+MAX_WAIT_MS = 50
+
+
+@dataclass(slots=True)
+class _PendingEdit:
+    """Latest requested state of a message and callers waiting for it"""
+    bot: Bot
+    text: str
+    reply_markup: Optional[InlineKeyboardMarkup]
+    parse_mode: Optional[str]
+    waiters: List[asyncio.Future] = field(default_factory=list)
+
+
+class EditBatcher:
+    """
+    Batches edit_message_text calls keyed by (chat_id, message_id)
+
+    A newer edit of a message that is not sent yet replaces the pending one,
+    and all callers receive the result of the edit actually sent
+    """
+
+    def __init__(self, max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: int = MAX_WAIT_MS):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: Dict[Tuple[int, int], _PendingEdit] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, bot: Bot, chat_id: int, message_id: int, text: str,
+                     reply_markup: Optional[InlineKeyboardMarkup] = None,
+                     parse_mode: Optional[str] = None) -> Any:
+        """
+        Schedule message edit and wait until it is sent
+
+        Args:
+            bot: Bot instance
+            chat_id: Chat ID
+            message_id: Message ID to edit
+            text: New message text
+            reply_markup: New keyboard (optional)
+            parse_mode: Parse mode (optional)
+
+        Returns:
+            Result of edit_message_text
+
+        Raises:
+            Exception raised by edit_message_text
+        """
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run_loop())
+
+        waiter = asyncio.get_running_loop().create_future()
+        key = (chat_id, message_id)
+
+        pending = self._pending.get(key)
+        if pending:
+            # Supersede edit that is not sent yet
+            pending.bot = bot
+            pending.text = text
+            pending.reply_markup = reply_markup
+            pending.parse_mode = parse_mode
+        else:
+            pending = _PendingEdit(bot, text, reply_markup, parse_mode)
+            self._pending[key] = pending
+            self._queue.put_nowait(key)
+        pending.waiters.append(waiter)
+
+        return await waiter
+
+    async def _run_loop(self) -> None:
+        """Collect pending edits and flush them in batches"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[int, int]]) -> None:
+        """Send batch of edits concurrently and resolve their waiters"""
+        edits = [(key, self._pending.pop(key)) for key in batch]
+        logger.debug("Flushing %s message edits", len(edits))
+
+        results = await asyncio.gather(
+            *(pending.bot.edit_message_text(
+                chat_id=chat_id,
+                message_id=message_id,
+                text=pending.text,
+                reply_markup=pending.reply_markup,
+                parse_mode=pending.parse_mode
+            ) for (chat_id, message_id), pending in edits),
+            return_exceptions=True
+        )
+
+        for (_, pending), result in zip(edits, results):
+            for waiter in pending.waiters:
+                if waiter.done():
+                    continue
+                if isinstance(result, BaseException):
+                    waiter.set_exception(result)
+                else:
+                    waiter.set_result(result)
+
+
+# Shared batcher for menu message edits
+batcher = EditBatcher()
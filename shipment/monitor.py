@@ -4,24 +4,30 @@ Provides asynchronous monitoring loops for shipment tracking
 """
 import logging
 import asyncio
+import time
 import aiohttp
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Set, Tuple
 
 from aiogram.enums import ParseMode
+from aiogram.exceptions import TelegramAPIError, TelegramNetworkError, TelegramRetryAfter, TelegramServerError
 
-from shipment.api import authenticate, get_shipments, get_shipment_details
+from shipment.api import (
+    authenticate, get_session, iter_shipments, get_shipment_details, forget_shipment_details,
+    forget_account_details, token_needs_refresh
+)
 from shipment.utils import (
     is_new_shipment,
-    calculate_max_stats,
+    shipment_payload_hash,
     has_progress_changed,
     update_last_progress,
-    get_shipment_grouped_info,
+    summarize_shipment,
     format_progress_message,
     format_completed_shipment
 )
 from utils.config import CHANNEL_ID, CHANNEL_ID2, LIVE_TOPIC_ID, COMPLETED_TOPIC_ID
-from utils.config import CHECK_INTERVAL, REFRESH_INTERVAL, INACTIVITY_TIMEOUT
+from utils.config import CHECK_INTERVAL, REFRESH_INTERVAL, INACTIVITY_TIMEOUT, AccountConfig, ShipmentState
+from utils.async_util import gather_with_concurrency
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -29,116 +35,35 @@ logger = logging.getLogger(__name__)
 # Global monitoring state
 monitoring_tasks: Dict[str, asyncio.Task] = {}
 
-async def check_new_shipments_loop(bot, account_id: str, account_data: Dict, session: aiohttp.ClientSession) -> None:
-    """
-    Loop for checking new shipments
-
-    Args:
-        bot: Bot instance
-        account_id: Account ID
-        account_data: Account data
-        session: aiohttp session
-    """
-    account_name = account_data['name']
-    logger.info(f"Starting check_new_shipments_loop for {account_name}")
-
-    refresh_counter = 0
-
-    while True:
-        try:
-            # Re-authenticate every 30 iterations to refresh token
-            if refresh_counter >= 30:
-                logger.info(f"Refreshing authentication for {account_name}")
-                auth_success, _ = await authenticate(session, account_id)
-                if not auth_success:
-                    logger.warning(f"Failed to refresh authentication for {account_name}")
-                refresh_counter = 0
-
-            # Get active shipments
-            shipments = await get_shipments(session, account_id, account_data)
-
-            if not shipments:
-                logger.warning(f"No shipments data for {account_name}, retrying later")
-                await asyncio.sleep(REFRESH_INTERVAL)
-                refresh_counter += 1
-                continue
-
-            logger.info(f"Processing {len(shipments)} shipments for {account_name}")
-
-            # Get monitoring start time
-            from utils.config import monitoring_start_times
-            monitoring_start_time = monitoring_start_times.get(account_id)
-
-            for shipment in shipments:
-                shipment_id = shipment.get('id')
-                if not shipment_id:
-                    continue
-
-                # Skip already processed shipments
-                if shipment_id in account_data['shipment']['processed_shipments']:
-                    continue
-
-                # Check if it's a new shipment
-                if is_new_shipment(shipment, monitoring_start_time):
-                    logger.info(f"New shipment detected: {shipment_id} for {account_name}")
-
-                    # Get shipment details
-                    shipment_details = await get_shipment_details(session, account_data, shipment_id)
-
-                    if not shipment_details:
-                        logger.error(f"Failed to get details for shipment {shipment_id}")
-                        continue
-
-                    # Calculate maximum statistics
-                    max_stats = calculate_max_stats(shipment_details)
-
-                    # Get grouped information
-                    info = get_shipment_grouped_info(shipment_details, max_stats)
-
-                    # Check if shipment is already completed
-                    if shipment_details.get('state') in ['closed', 'terminated', 'canceled']:
-                        # Format message for completed shipment
-                        message_text = format_completed_shipment(account_name, info)
-
-                        # Send to completed channel/topic
-                        await send_to_channel(bot, message_text, account_id, shipment_id, "completed")
-
-                        # Mark as completed and processed
-                        account_data['shipment']['completed_shipments'].add(shipment_id)
-                        account_data['shipment']['processed_shipments'].add(shipment_id)
-                        logger.info(f"Completed shipment {shipment_id} processed for {account_name}")
-                    else:
-                        # Format message for active shipment
-                        message_text = format_progress_message(account_name, info)
-
-                        # Send to live channel/topic
-                        message_id = await send_to_channel(bot, message_text, account_id, shipment_id, "live")
+# Maximum number of shipment details requests in flight per account
+DETAILS_CONCURRENCY = 8
 
-                        if message_id:
-                            # Store message ID for updates
-                            account_data['shipment']['message_ids'][shipment_id] = message_id
+# Maximum number of Telegram messages sent at once per account
+SEND_CONCURRENCY = 8
 
-                            # Store current progress
-                            update_last_progress(shipment_id, info, account_data['shipment']['last_progress'])
+# Number of workers consuming monitoring events per account
+MONITOR_WORKERS = 8
 
-                            # Update last activity time
-                            account_data['shipment']['last_activity_time'][shipment_id] = datetime.now()
+# Maximum number of pending monitoring events per account
+WORK_QUEUE_SIZE = 256
 
-                            # Start monitoring this shipment
-                            account_data['shipment']['monitored_shipments'][shipment_id] = shipment_details
-                            logger.info(f"Started monitoring shipment {shipment_id} for {account_name}")
-
-            refresh_counter += 1
-
-        except Exception as e:
-            logger.error(f"Error in check_new_shipments_loop for {account_name}: {e}", exc_info=True)
+# Expected network/server failures, logged without traceback
+_TRANSIENT_ERRORS = (
+    aiohttp.ClientError, asyncio.TimeoutError,
+    TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+)
 
-        # Sleep until next iteration
-        await asyncio.sleep(REFRESH_INTERVAL)
+# Monitoring event types
+EVENT_NEW_SHIPMENTS = "new"
+EVENT_UPDATE_SHIPMENT = "update"
 
-async def update_active_shipments_loop(bot, account_id: str, account_data: Dict, session: aiohttp.ClientSession) -> None:
+async def shipment_monitoring_loop(bot, account_id: str, account_data: AccountConfig, session: aiohttp.ClientSession) -> None:
     """
-    Loop for updating active shipments
+    Single monitoring loop for account
+
+    Producer enqueues an update event for every monitored shipment each tick
+    and, every REFRESH_INTERVAL, a batch of shipments per office for discovery.
+    MONITOR_WORKERS workers consume the bounded queue concurrently
 
     Args:
         bot: Bot instance
@@ -146,101 +71,282 @@ async def update_active_shipments_loop(bot, account_id: str, account_data: Dict,
         account_data: Account data
         session: aiohttp session
     """
-    account_name = account_data['name']
-    logger.info(f"Starting update_active_shipments_loop for {account_name}")
+    account_name = account_data.name
+    state: ShipmentState = account_data.shipment
+    logger.info("Starting shipment_monitoring_loop for %s", account_name)
+
+    # Guards multi-step updates of shipment state while updates run concurrently
+    state_lock = asyncio.Lock()
+
+    # shipment_id -> payload hash of last fully handled details
+    handled_hashes: Dict[int, int] = {}
+
+    # Pending events, put() blocks producer when workers fall behind
+    work_q: asyncio.Queue = asyncio.Queue(maxsize=WORK_QUEUE_SIZE)
+
+    # Shipments with update event queued or in progress
+    queued_updates: Set[int] = set()
+
+    # Monotonic timestamp of current tick, shared by all events of the tick
+    tick_now = time.monotonic()
+
+    async def _process_new(shipments: List[Dict], monitoring_start_time: Optional[datetime]) -> None:
+        """Post and start monitoring new shipments from one office"""
+        # Collect new shipments that are not processed yet
+        processed_shipments = state.processed_shipments
+        new_shipment_ids = [
+            shipment['id'] for shipment in shipments
+            if shipment.get('id')
+            and shipment['id'] not in processed_shipments
+            and is_new_shipment(shipment, monitoring_start_time)
+        ]
+
+        # Get details for all new shipments concurrently
+        details_list = await gather_with_concurrency(
+            DETAILS_CONCURRENCY,
+            *(get_shipment_details(session, account_data, shipment_id) for shipment_id in new_shipment_ids),
+            return_exceptions=True
+        )
+
+        # Prepare messages for new shipments
+        pending = []
+        for shipment_id, shipment_details in zip(new_shipment_ids, details_list):
+            logger.info("New shipment detected: %s for %s", shipment_id, account_name)
+
+            if isinstance(shipment_details, Exception):
+                logger.error("Error getting details for shipment %s: %s", shipment_id, shipment_details)
+                continue
+
+            if not shipment_details:
+                logger.error("Failed to get details for shipment %s", shipment_id)
+                continue
 
-    while True:
-        try:
-            monitored_shipments = list(account_data['shipment']['monitored_shipments'].keys())
-            logger.debug(f"Updating {len(monitored_shipments)} monitored shipments for {account_name}")
+            # Get grouped information
+            info = summarize_shipment(shipment_details)
 
-            for shipment_id in monitored_shipments:
-                # Skip completed shipments
-                if shipment_id in account_data['shipment']['completed_shipments']:
-                    continue
+            # Check if shipment is already completed
+            if shipment_details.get('state') in ['closed', 'terminated', 'canceled']:
+                # Format message for completed shipment, send to completed channel/topic
+                message_type = "completed"
+                message_text = format_completed_shipment(account_name, info)
+            else:
+                # Format message for active shipment, send to live channel/topic
+                message_type = "live"
+                message_text = format_progress_message(account_name, info)
+
+            pending.append((shipment_id, shipment_details, info, message_type, message_text))
+
+        # Send all messages concurrently
+        message_ids = await gather_with_concurrency(
+            SEND_CONCURRENCY,
+            *(send_to_channel(bot, message_text, account_id, shipment_id, message_type)
+              for shipment_id, _, _, message_type, message_text in pending)
+        )
+
+        for (shipment_id, shipment_details, info, message_type, _), message_id in zip(pending, message_ids):
+            if message_type == "completed":
+                # Mark as completed and processed
+                state.completed_shipments.add(shipment_id)
+                state.processed_shipments.add(shipment_id)
+                forget_shipment_details(account_data, shipment_id)
+                logger.info("Completed shipment %s processed for %s", shipment_id, account_name)
+            elif message_id:
+                # Store message ID for updates
+                state.message_ids[shipment_id] = message_id
+
+                # Store current progress
+                update_last_progress(shipment_id, info, state.last_progress)
+
+                # Update last activity time
+                state.last_activity_time[shipment_id] = tick_now
+
+                # Start monitoring this shipment
+                state.monitored_shipments[shipment_id] = shipment_details
+                logger.info("Started monitoring shipment %s for %s", shipment_id, account_name)
+
+    async def _discover() -> None:
+        """Enqueue shipments of all offices for discovery"""
+        # Get monitoring start time
+        from utils.config import monitoring_start_times
+        monitoring_start_time = monitoring_start_times.get(account_id)
+
+        # Enqueue shipments of each office as soon as it responds
+        total_shipments = 0
+        async for office_id, shipments in iter_shipments(session, account_id, account_data):
+            total_shipments += len(shipments)
+            if not shipments:
+                continue
+
+            logger.info("Queued %s shipments of office %s for %s", len(shipments), office_id, account_name)
+            await work_q.put((EVENT_NEW_SHIPMENTS, (shipments, monitoring_start_time)))
+
+        if not total_shipments:
+            logger.warning("No shipments data for %s, retrying later", account_name)
+
+    async def _update_one(shipment_id: int) -> None:
+        """Update single monitored shipment"""
+        # Shipment may have completed or expired while event was queued
+        if shipment_id not in state.monitored_shipments or shipment_id in state.completed_shipments:
+            return
 
-                # Check last activity time
-                last_activity = account_data['shipment']['last_activity_time'].get(shipment_id)
-                if last_activity:
-                    inactive_time = (datetime.now() - last_activity).total_seconds()
+        # Check last activity time
+        last_activity = state.last_activity_time.get(shipment_id)
+        if last_activity is not None:
+            inactive_time = tick_now - last_activity
 
-                    if inactive_time > INACTIVITY_TIMEOUT:
-                        logger.info(f"Shipment {shipment_id} inactive for {inactive_time} seconds, removing from monitoring")
-                        del account_data['shipment']['monitored_shipments'][shipment_id]
-                        continue
+            if inactive_time > INACTIVITY_TIMEOUT:
+                logger.info("Shipment %s inactive for %.0f seconds, removing from monitoring", shipment_id, inactive_time)
+                async with state_lock:
+                    state.monitored_shipments.pop(shipment_id, None)
+                forget_shipment_details(account_data, shipment_id)
+                handled_hashes.pop(shipment_id, None)
+                return
 
-                # Get shipment details
-                shipment_details = await get_shipment_details(session, account_data, shipment_id)
+        # Get shipment details
+        shipment_details = await get_shipment_details(session, account_data, shipment_id)
 
-                if not shipment_details:
-                    logger.error(f"Failed to get details for shipment {shipment_id}")
-                    continue
+        if not shipment_details:
+            logger.error("Failed to get details for shipment %s", shipment_id)
+            return
 
-                # Update stored shipment data
-                account_data['shipment']['monitored_shipments'][shipment_id] = shipment_details
+        # Update stored shipment data
+        state.monitored_shipments[shipment_id] = shipment_details
 
-                # Calculate maximum statistics
-                max_stats = calculate_max_stats(shipment_details)
+        # Nothing to do if details did not change since last handled update
+        payload_hash = shipment_payload_hash(shipment_details)
+        if handled_hashes.get(shipment_id) == payload_hash:
+            return
 
-                # Get grouped information
-                info = get_shipment_grouped_info(shipment_details, max_stats)
+        # Get grouped information
+        info = summarize_shipment(shipment_details)
 
-                # Check if shipment is completed
-                if shipment_details.get('state') in ['closed', 'terminated', 'canceled']:
-                    logger.info(f"Shipment {shipment_id} completed")
+        # Check if shipment is completed
+        if shipment_details.get('state') in ['closed', 'terminated', 'canceled']:
+            logger.info("Shipment %s completed", shipment_id)
 
-                    # Format message for completed shipment
-                    message_text = format_completed_shipment(account_name, info)
+            # Format message for completed shipment
+            message_text = format_completed_shipment(account_name, info)
 
-                    # Send to completed channel/topic
-                    await send_to_channel(bot, message_text, account_id, shipment_id, "completed")
+            # Send to completed channel/topic
+            await send_to_channel(bot, message_text, account_id, shipment_id, "completed")
 
-                    # Delete original message if exists
-                    original_message_id = account_data['shipment']['message_ids'].get(shipment_id)
-                    if original_message_id:
-                        try:
-                            await bot.delete_message(chat_id=CHANNEL_ID, message_id=original_message_id)
-                            logger.info(f"Deleted original message for shipment {shipment_id}")
-                        except Exception as e:
-                            logger.error(f"Error deleting original message: {e}")
+            # Delete original message if exists, completed shipment is never edited again
+            original_message_id = state.message_ids.pop(shipment_id, None)
+            if original_message_id:
+                try:
+                    await bot.delete_message(chat_id=CHANNEL_ID, message_id=original_message_id)
+                    logger.info("Deleted original message for shipment %s", shipment_id)
+                except TelegramAPIError as e:
+                    logger.error("Error deleting original message: %s", e)
 
-                    # Mark as completed
-                    account_data['shipment']['completed_shipments'].add(shipment_id)
-                    del account_data['shipment']['monitored_shipments'][shipment_id]
+            # Mark as completed
+            async with state_lock:
+                state.completed_shipments.add(shipment_id)
+                state.monitored_shipments.pop(shipment_id, None)
+            forget_shipment_details(account_data, shipment_id)
+            handled_hashes.pop(shipment_id, None)
 
+        else:
+            # Check if progress has changed
+            if has_progress_changed(shipment_id, info, state.last_progress):
+                logger.info("Progress changed for shipment %s", shipment_id)
+
+                # Format message for active shipment
+                message_text = format_progress_message(account_name, info)
+
+                # Update existing message
+                message_id = state.message_ids.get(shipment_id)
+                if message_id:
+                    try:
+                        await bot.edit_message_text(
+                            chat_id=CHANNEL_ID,
+                            message_id=message_id,
+                            text=message_text,
+                            parse_mode=ParseMode.HTML
+                        )
+                    except TelegramAPIError as e:
+                        logger.error("Error updating message: %s", e)
+                        return
+
+                    logger.info("Updated message for shipment %s", shipment_id)
+
+                    async with state_lock:
+                        # Update last progress
+                        update_last_progress(shipment_id, info, state.last_progress)
+
+                        # Update last activity time
+                        state.last_activity_time[shipment_id] = tick_now
+
+                    handled_hashes[shipment_id] = payload_hash
+            else:
+                handled_hashes[shipment_id] = payload_hash
+
+    async def _enqueue_updates() -> None:
+        """Enqueue update events for monitored shipments"""
+        # Skip completed shipments and shipments already queued
+        completed_shipments = state.completed_shipments
+        monitored_shipments = [
+            shipment_id for shipment_id in state.monitored_shipments
+            if shipment_id not in completed_shipments
+            and shipment_id not in queued_updates
+        ]
+        logger.debug("Queueing %s monitored shipments for %s", len(monitored_shipments), account_name)
+
+        for shipment_id in monitored_shipments:
+            queued_updates.add(shipment_id)
+            await work_q.put((EVENT_UPDATE_SHIPMENT, shipment_id))
+
+    async def _worker() -> None:
+        """Consume monitoring events"""
+        while True:
+            event_type, payload = await work_q.get()
+            try:
+                if event_type == EVENT_UPDATE_SHIPMENT:
+                    await _update_one(payload)
                 else:
-                    # Check if progress has changed
-                    if has_progress_changed(shipment_id, info, account_data['shipment']['last_progress']):
-                        logger.info(f"Progress changed for shipment {shipment_id}")
-
-                        # Format message for active shipment
-                        message_text = format_progress_message(account_name, info)
-
-                        # Update existing message
-                        message_id = account_data['shipment']['message_ids'].get(shipment_id)
-                        if message_id:
-                            try:
-                                await bot.edit_message_text(
-                                    chat_id=CHANNEL_ID,
-                                    message_id=message_id,
-                                    text=message_text,
-                                    parse_mode=ParseMode.HTML
-                                )
-                                logger.info(f"Updated message for shipment {shipment_id}")
-
-                                # Update last progress
-                                update_last_progress(shipment_id, info, account_data['shipment']['last_progress'])
-
-                                # Update last activity time
-                                account_data['shipment']['last_activity_time'][shipment_id] = datetime.now()
-                            except Exception as e:
-                                logger.error(f"Error updating message: {e}")
-
-        except Exception as e:
-            logger.error(f"Error in update_active_shipments_loop for {account_name}: {e}", exc_info=True)
-
-        # Sleep until next iteration
-        await asyncio.sleep(CHECK_INTERVAL)
+                    await _process_new(*payload)
+            except _TRANSIENT_ERRORS as e:
+                logger.warning("Transient error handling %s event for %s: %s", event_type, account_name, e)
+            except Exception as e:
+                logger.error("Error handling %s event for %s: %s", event_type, account_name, e, exc_info=True)
+            finally:
+                if event_type == EVENT_UPDATE_SHIPMENT:
+                    queued_updates.discard(payload)
+                work_q.task_done()
+
+    async def _producer() -> None:
+        """Produce monitoring events every tick"""
+        last_discovery: Optional[float] = None
+
+        nonlocal tick_now
+
+        while True:
+            tick_now = time.monotonic()
+            try:
+                await _enqueue_updates()
+
+                # Discover new shipments every REFRESH_INTERVAL
+                if last_discovery is None or tick_now - last_discovery >= REFRESH_INTERVAL:
+                    last_discovery = tick_now
+
+                    # Re-authenticate only when bearer token is about to expire
+                    if token_needs_refresh(account_data):
+                        logger.info("Refreshing authentication for %s", account_name)
+                        auth_success, _ = await authenticate(session, account_id)
+                        if not auth_success:
+                            logger.warning("Failed to refresh authentication for %s", account_name)
+
+                    await _discover()
+
+            except _TRANSIENT_ERRORS as e:
+                logger.warning("Transient error in shipment_monitoring_loop for %s: %s", account_name, e)
+            except Exception as e:
+                logger.error("Error in shipment_monitoring_loop for %s: %s", account_name, e, exc_info=True)
+
+            # Sleep until next tick
+            await asyncio.sleep(min(CHECK_INTERVAL, REFRESH_INTERVAL))
+
+    await asyncio.gather(_producer(), *(_worker() for _ in range(MONITOR_WORKERS)))
 
 async def send_to_channel(bot, text: str, account_id: str, shipment_id: int,
                           message_type: str = "live") -> Optional[int]:
@@ -271,7 +377,7 @@ async def send_to_channel(bot, text: str, account_id: str, shipment_id: int,
                     text=text,
                     parse_mode=ParseMode.HTML
                 )
-                logger.info(f"Sent {message_type} message for shipment {shipment_id} to primary channel (no topic)")
+                logger.info("Sent %s message for shipment %s to primary channel (no topic)", message_type, shipment_id)
                 return message.message_id
             else:  # completed
                 message = await bot.send_message(
@@ -279,7 +385,7 @@ async def send_to_channel(bot, text: str, account_id: str, shipment_id: int,
                     text=text,
                     parse_mode=ParseMode.HTML
                 )
-                logger.info(f"Sent {message_type} message for shipment {shipment_id} to secondary channel (no topic)")
+                logger.info("Sent %s message for shipment %s to secondary channel (no topic)", message_type, shipment_id)
                 return message.message_id
         else:
             # Режим одного канала с топиками или без
@@ -292,7 +398,7 @@ async def send_to_channel(bot, text: str, account_id: str, shipment_id: int,
                     text=text,
                     parse_mode=ParseMode.HTML
                 )
-                logger.info(f"Sent {message_type} message for shipment {shipment_id} to main channel (no topic)")
+                logger.info("Sent %s message for shipment %s to main channel (no topic)", message_type, shipment_id)
                 return message.message_id
             else:
                 # Отправляем с топиком
@@ -302,24 +408,29 @@ async def send_to_channel(bot, text: str, account_id: str, shipment_id: int,
                     parse_mode=ParseMode.HTML,
                     message_thread_id=topic_id
                 )
-                logger.info(f"Sent {message_type} message for shipment {shipment_id} to main channel topic {topic_id}")
+                logger.info("Sent %s message for shipment %s to main channel topic %s", message_type, shipment_id, topic_id)
                 return message.message_id
+    except TelegramAPIError as e:
+        logger.error("Error sending message to channel: %s", e)
+        return None
     except Exception as e:
-        logger.error(f"Error sending message to channel: {e}", exc_info=True)
+        logger.error("Error sending message to channel: %s", e, exc_info=True)
         return None
 
-async def background_monitoring_account(bot, account_id: str) -> None:
+async def background_monitoring_account(bot, account_id: str,
+                                        session: Optional[aiohttp.ClientSession] = None) -> None:
     """
     Background monitoring for a specific account
 
     Args:
         bot: Bot instance
         account_id: Account ID to monitor
+        session: aiohttp session shared by all accounts (default: shipment API session)
     """
     from utils.config import accounts
 
     account_data = accounts.get(account_id)
-    if not account_data or not account_data['enabled']['shipment']:
+    if not account_data or not account_data.enabled.shipment:
         logger.error(f"Account {account_id} not found or shipment disabled")
         return
 
@@ -327,34 +438,33 @@ async def background_monitoring_account(bot, account_id: str) -> None:
     from utils.config import monitoring_start_times
     monitoring_start_times[account_id] = datetime.now()
 
-    # Create aiohttp session
-    async with aiohttp.ClientSession() as session:
-        # Authenticate
-        auth_success, auth_message = await authenticate(session, account_id)
+    # Use shared aiohttp session
+    if session is None:
+        session = await get_session()
 
-        if not auth_success:
-            logger.error(f"Failed to authenticate account {account_id}: {auth_message}")
-            return
+    # Authenticate
+    auth_success, auth_message = await authenticate(session, account_id)
+
+    if not auth_success:
+        logger.error(f"Failed to authenticate account {account_id}: {auth_message}")
+        return
+
+    # Start monitoring loop
+    try:
+        await shipment_monitoring_loop(bot, account_id, account_data, session)
+    except asyncio.CancelledError:
+        logger.info(f"Monitoring for account {account_id} cancelled")
+    except Exception as e:
+        logger.error(f"Error in background monitoring for {account_id}: {e}", exc_info=True)
 
-        # Start monitoring loops
-        try:
-            # Run both loops in parallel
-            await asyncio.gather(
-                check_new_shipments_loop(bot, account_id, account_data, session),
-                update_active_shipments_loop(bot, account_id, account_data, session)
-            )
-        except asyncio.CancelledError:
-            logger.info(f"Monitoring for account {account_id} cancelled")
-        except Exception as e:
-            logger.error(f"Error in background monitoring for {account_id}: {e}", exc_info=True)
-
-def start_monitoring(bot, account_id: str) -> bool:
+def start_monitoring(bot, account_id: str, session: Optional[aiohttp.ClientSession] = None) -> bool:
     """
     Start monitoring for a specific account
 
     Args:
         bot: Bot instance
         account_id: Account ID to monitor
+        session: aiohttp session shared by all accounts (default: shipment API session)
 
     Returns:
         True if monitoring started, False otherwise
@@ -369,7 +479,7 @@ def start_monitoring(bot, account_id: str) -> bool:
     account_monitoring[account_id] = True
 
     # Create background task
-    task = asyncio.create_task(background_monitoring_account(bot, account_id))
+    task = asyncio.create_task(background_monitoring_account(bot, account_id, session))
     monitoring_tasks[account_id] = task
 
     logger.info(f"Started monitoring for account {account_id}")
@@ -385,7 +495,7 @@ def stop_monitoring(account_id: str) -> bool:
     Returns:
         True if monitoring stopped, False otherwise
     """
-    from utils.config import account_monitoring
+    from utils.config import accounts, account_monitoring
 
     if not account_monitoring.get(account_id, False):
         logger.warning(f"No active monitoring for account {account_id}")
@@ -399,6 +509,11 @@ def stop_monitoring(account_id: str) -> bool:
     # Update monitoring state
     account_monitoring[account_id] = False
 
+    # Drop conditional request validators of account shipments
+    account_data = accounts.get(account_id)
+    if account_data and account_data.shipment:
+        forget_account_details(account_data)
+
     logger.info(f"Stopped monitoring for account {account_id}")
     return True
 
@@ -4,20 +4,22 @@ Handles all commands and callbacks for the Shipment functionality
 """
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, FrozenSet, List, Any, Optional, Tuple
 
 from aiogram import Router, F, Bot
+from cachetools import TTLCache
 from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.enums import ParseMode
 
+from shipment.batcher import batcher
 from shipment.monitor import (
     start_monitoring,
     stop_monitoring,
     stop_all_monitoring,
     is_monitoring_active
 )
-from utils.config import accounts, account_monitoring
+from utils.config import AccountConfig, accounts, account_monitoring
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -25,61 +27,210 @@ logger = logging.getLogger(__name__)
 # Initialize router
 router = Router()
 
-# Message state storage
-messages: Dict[int, Dict[str, Any]] = {}
+# Message state storage, entries of idle users expire after an hour
+messages: TTLCache = TTLCache(maxsize=10_000, ttl=3600)
+
+# (chat_id, message_id) -> hash of last text sent by safe_edit
+_last_sent: TTLCache = TTLCache(maxsize=10_000, ttl=600)
+
+# Shipment-enabled (account_id, account_data) pairs, built on first use
+# Accounts are loaded once and fixed for the life of the process
+_enabled_cache: Optional[List[Tuple[str, AccountConfig]]] = None
+# IDs of the same accounts for membership checks
+_enabled_ids_cache: Optional[FrozenSet[str]] = None
+
+# Per-account callback data prefixes
+_START_PREFIX = "shipment_start_account_"
+_START_LEN = len(_START_PREFIX)
+_STOP_PREFIX = "shipment_stop_account_"
+_STOP_LEN = len(_STOP_PREFIX)
+
+# Static texts and parse mode, built once
+_PM = ParseMode.MARKDOWN
+_MENU_TEXT = (
+    "🚚 *Режим Отгрузки*\n\n"
+    "Выберите действие из меню ниже:\n\n"
+    "📊 *Статус* - текущий статус мониторинга отгрузок\n"
+    "❓ *Помощь* - информация о работе с отгрузками\n"
+    "▶️ *Запустить мониторинг* - запустить мониторинг всех аккаунтов\n"
+    "⏸ *Остановить мониторинг* - остановить мониторинг всех аккаунтов\n"
+    "⚙️ *Выбрать аккаунты* - включить/выключить отдельные аккаунты\n"
+)
+_HELP_TEXT = (
+    "❓ *Справка по работе с отгрузками*\n\n"
+    "*Мониторинг отгрузок* позволяет в реальном времени отслеживать процесс отгрузки товаров на Wildberries.\n\n"
+    "*Основные функции:*\n\n"
+    "▶️ *Запустить мониторинг* - начать мониторинг всех включенных аккаунтов\n"
+    "⏸ *Остановить мониторинг* - прекратить мониторинг всех аккаунтов\n"
+    "⚙️ *Выбрать аккаунты* - включить/выключить мониторинг отдельных аккаунтов\n\n"
+    "*Как работает мониторинг:*\n\n"
+    "1. Бот проверяет новые отгрузки каждые 60 секунд\n"
+    "2. При обнаружении новой отгрузки, создается сообщение с информацией\n"
+    "3. Статус отгрузки обновляется каждые 10 секунд в реальном времени\n"
+    "4. Когда отгрузка завершается, она перемещается в отдельный топик/канал\n\n"
+    "*Сообщения отправляются:*\n"
+    "- Активные отгрузки - в основной канал/топик\n"
+    "- Завершенные отгрузки - в отдельный топик или второй канал\n\n"
+    "⚠️ Для работы мониторинга бот должен быть запущен. Если бот был перезапущен, необходимо заново включить мониторинг."
+)
+_SELECT_ACCOUNTS_TEXT = (
+    "⚙️ *Выбор аккаунтов для мониторинга*\n\n"
+    "Нажмите на аккаунт, чтобы включить/выключить его мониторинг:\n\n"
+    "🟢 Включен - мониторинг активен\n"
+    "⚪ Выключен - мониторинг не активен\n"
+)
+_STARTING_TEXT = "🔄 Запуск мониторинга для всех аккаунтов...\n\nПожалуйста, подождите."
+_STOPPING_TEXT = "🔄 Остановка мониторинга для всех аккаунтов...\n\nПожалуйста, подождите."
+_STOP_ALL_TEXT = (
+    "⏹ *Мониторинг отгрузок остановлен*\n\n"
+    "Мониторинг всех аккаунтов успешно остановлен.\n"
+    "Для возобновления мониторинга нажмите «Запустить мониторинг»."
+)
+_STOP_CMD_TEXT = (
+    "⏹ *Мониторинг отгрузок остановлен*\n\n"
+    "Мониторинг всех аккаунтов успешно остановлен.\n"
+    "Для возобновления мониторинга используйте команду /monitor или нажмите «Запустить мониторинг» в меню."
+)
+
+# Static keyboards, built once
+_SHIPMENT_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [
+        InlineKeyboardButton(text="📊 Статус", callback_data="shipment_status"),
+        InlineKeyboardButton(text="❓ Помощь", callback_data="shipment_help")
+    ],
+    [
+        InlineKeyboardButton(text="▶️ Запустить мониторинг", callback_data="shipment_start_all")
+    ],
+    [
+        InlineKeyboardButton(text="⏸ Остановить мониторинг", callback_data="shipment_stop_all")
+    ],
+    [
+        InlineKeyboardButton(text="⚙️ Выбрать аккаунты", callback_data="shipment_select_accounts")
+    ],
+    [
+        InlineKeyboardButton(text="⬅️ Назад в главное меню", callback_data="back_to_main")
+    ]
+])
+_BACK_ROW = [InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_shipment")]
+_BACK_KB = InlineKeyboardMarkup(inline_keyboard=[_BACK_ROW])
+
+# account_id -> (inactive row, active row) of selection keyboard
+_account_buttons: Dict[str, Tuple[List[InlineKeyboardButton], List[InlineKeyboardButton]]] = {}
+
+def _enabled_accounts() -> List[Tuple[str, AccountConfig]]:
+    """Get shipment-enabled accounts in config order"""
+    global _enabled_cache
+    if _enabled_cache is None:
+        _enabled_cache = [
+            (account_id, account_data) for account_id, account_data in accounts.items()
+            if account_data.enabled.shipment
+        ]
+    return _enabled_cache
+
+def _enabled_ids() -> FrozenSet[str]:
+    """Get IDs of shipment-enabled accounts"""
+    global _enabled_ids_cache
+    if _enabled_ids_cache is None:
+        _enabled_ids_cache = frozenset(account_id for account_id, _ in _enabled_accounts())
+    return _enabled_ids_cache
+
+def _account_selection_text(suffix: str = "") -> str:
+    """Get account selection menu text with optional status line appended"""
+    return _SELECT_ACCOUNTS_TEXT + suffix
+
+async def safe_edit(callback: CallbackQuery, text: str,
+                    reply_markup: Optional[InlineKeyboardMarkup] = None) -> None:
+    """
+    Edit callback message unless it already shows the same content
+
+    Repeated presses of the same button would otherwise cost a round-trip
+    answered with "message is not modified". Message keyboard is compared too,
+    since other modules edit the same menu messages
+
+    Args:
+        callback: Callback query whose message is edited
+        text: New message text
+        reply_markup: New keyboard (optional)
+    """
+    key = (callback.message.chat.id, callback.message.message_id)
+    text_hash = hash(text)
+    if _last_sent.get(key) == text_hash and callback.message.reply_markup == reply_markup:
+        return
+
+    await batcher.submit(
+        callback.bot,
+        chat_id=key[0],
+        message_id=key[1],
+        text=text,
+        reply_markup=reply_markup,
+        parse_mode=_PM
+    )
+    _last_sent[key] = text_hash
 
 # Keyboard creation functions
 def get_shipment_keyboard() -> InlineKeyboardMarkup:
-    """Create Shipment main menu keyboard"""
-    keyboard = [
-        [
-            InlineKeyboardButton(text="📊 Статус", callback_data="shipment_status"),
-            InlineKeyboardButton(text="❓ Помощь", callback_data="shipment_help")
-        ],
-        [
-            InlineKeyboardButton(text="▶️ Запустить мониторинг", callback_data="shipment_start_all")
-        ],
-        [
-            InlineKeyboardButton(text="⏸ Остановить мониторинг", callback_data="shipment_stop_all")
-        ],
-        [
-            InlineKeyboardButton(text="⚙️ Выбрать аккаунты", callback_data="shipment_select_accounts")
-        ],
-        [
-            InlineKeyboardButton(text="⬅️ Назад в главное меню", callback_data="back_to_main")
-        ]
-    ]
-    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+    """Get Shipment main menu keyboard"""
+    return _SHIPMENT_KB
 
 def get_back_to_shipment_keyboard() -> InlineKeyboardMarkup:
-    """Create keyboard with back button to Shipment menu"""
-    return InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_shipment")]
-    ])
+    """Get keyboard with back button to Shipment menu"""
+    return _BACK_KB
+
+def _account_button(account_id: str, account_data: AccountConfig, is_active: bool) -> InlineKeyboardButton:
+    """Create toggle button for account in given monitoring state"""
+    status_text = "🟢 Включен" if is_active else "⚪ Выключен"
+    prefix = _STOP_PREFIX if is_active else _START_PREFIX
+
+    return InlineKeyboardButton(
+        text=f"{account_data.name} ({status_text})",
+        callback_data=f"{prefix}{account_id}"
+    )
 
 def get_account_selection_keyboard() -> InlineKeyboardMarkup:
-    """Create keyboard for account selection for monitoring"""
-    keyboard = []
-
-    # Add toggle buttons for each account
-    for account_id, account_data in accounts.items():
-        if account_data['enabled']['shipment']:
-            is_active = is_monitoring_active(account_id)
-            status_text = "🟢 Включен" if is_active else "⚪ Выключен"
-            action = "shipment_stop_account" if is_active else "shipment_start_account"
-
-            keyboard.append([
-                InlineKeyboardButton(
-                    text=f"{account_data['name']} ({status_text})",
-                    callback_data=f"{action}_{account_id}"
-                )
-            ])
-
-    # Add back button
-    keyboard.append([InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_shipment")])
+    """
+    Create keyboard for account selection for monitoring
+
+    Monitoring state of every account is read on each call, since it may be
+    changed by other users, commands or monitors stopping on their own
+
+    Returns:
+        InlineKeyboardMarkup with toggle button per account
+    """
+    # Both button variants of every account are built once
+    if not _account_buttons:
+        for account_id, account_data in _enabled_accounts():
+            _account_buttons[account_id] = (
+                [_account_button(account_id, account_data, False)],
+                [_account_button(account_id, account_data, True)]
+            )
+
+    keyboard = [
+        _account_buttons[account_id][is_monitoring_active(account_id)]
+        for account_id, _ in _enabled_accounts()
+    ]
+    keyboard.append(_BACK_ROW)
 
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+def start_all_enabled(bot: Bot) -> Tuple[int, int, int]:
+    """
+    Start monitoring for all shipment-enabled accounts that are not running
+
+    start_monitoring only schedules a task, so accounts are started inline
+    without awaiting anything
+
+    Args:
+        bot: Bot instance
+
+    Returns:
+        Tuple of (started, already_running, errors) counts
+    """
+    enabled = [account_id for account_id, _ in _enabled_accounts()]
+    pending = [account_id for account_id in enabled if not is_monitoring_active(account_id)]
+
+    started = sum(1 for account_id in pending if start_monitoring(bot, account_id))
+    return started, len(enabled) - len(pending), len(pending) - started
+
 # Main entry point
 async def show_shipment_menu(bot: Bot, user_id: int, message_id: int = None):
     """
@@ -90,48 +241,40 @@ async def show_shipment_menu(bot: Bot, user_id: int, message_id: int = None):
         user_id: User ID
         message_id: Message ID to update (optional)
     """
-    menu_text = (
-        "🚚 *Режим Отгрузки*\n\n"
-        "Выберите действие из меню ниже:\n\n"
-        "📊 *Статус* - текущий статус мониторинга отгрузок\n"
-        "❓ *Помощь* - информация о работе с отгрузками\n"
-        "▶️ *Запустить мониторинг* - запустить мониторинг всех аккаунтов\n"
-        "⏸ *Остановить мониторинг* - остановить мониторинг всех аккаунтов\n"
-        "⚙️ *Выбрать аккаунты* - включить/выключить отдельные аккаунты\n"
-    )
 
     if message_id:
         # Update existing message
         try:
-            await bot.edit_message_text(
+            await batcher.submit(
+                bot,
                 chat_id=user_id,
                 message_id=message_id,
-                text=menu_text,
+                text=_MENU_TEXT,
                 reply_markup=get_shipment_keyboard(),
-                parse_mode=ParseMode.MARKDOWN
+                parse_mode=_PM
             )
         except Exception as e:
             logger.error(f"Error updating Shipment menu: {e}")
             # If update fails, send a new message
             sent_message = await bot.send_message(
                 chat_id=user_id,
-                text=menu_text,
+                text=_MENU_TEXT,
                 reply_markup=get_shipment_keyboard(),
-                parse_mode=ParseMode.MARKDOWN
+                parse_mode=_PM
             )
             messages[user_id] = {"shipment_menu_id": sent_message.message_id}
     else:
         # Send a new message
         sent_message = await bot.send_message(
             chat_id=user_id,
-            text=menu_text,
+            text=_MENU_TEXT,
             reply_markup=get_shipment_keyboard(),
-            parse_mode=ParseMode.MARKDOWN
+            parse_mode=_PM
         )
         messages[user_id] = {"shipment_menu_id": sent_message.message_id}
 
 # Callback handlers
-@router.callback_query(lambda c: c.data == "menu_shipment")
+@router.callback_query(F.data == "menu_shipment")
 async def callback_shipment_menu(callback: CallbackQuery):
     """Handler for Shipment menu selection from main menu"""
     await callback.answer()
@@ -143,7 +286,7 @@ async def callback_shipment_menu(callback: CallbackQuery):
 
     await show_shipment_menu(callback.bot, user_id, message_id)
 
-@router.callback_query(lambda c: c.data == "back_to_shipment")
+@router.callback_query(F.data == "back_to_shipment")
 async def callback_back_to_shipment(callback: CallbackQuery):
     """Handler for back button to Shipment menu"""
     await callback.answer()
@@ -152,251 +295,139 @@ async def callback_back_to_shipment(callback: CallbackQuery):
 
     await show_shipment_menu(callback.bot, user_id, message_id)
 
-@router.callback_query(lambda c: c.data == "shipment_status")
+@router.callback_query(F.data == "shipment_status")
 async def callback_shipment_status(callback: CallbackQuery):
     """Handler for status button"""
     await callback.answer()
-    user_id = callback.from_user.id
-    message_id = callback.message.message_id
 
     # Build status message
-    status_text = "📊 *Статус мониторинга отгрузок*\n\n"
+    parts = ["📊 *Статус мониторинга отгрузок*\n\n"]
 
     any_active = False
 
-    for account_id, account_data in accounts.items():
-        if account_data['enabled']['shipment']:
-            is_active = is_monitoring_active(account_id)
-            status = "🟢 Включен" if is_active else "⚪ Выключен"
+    for account_id, account_data in _enabled_accounts():
+        is_active = is_monitoring_active(account_id)
+        status = "🟢 Включен" if is_active else "⚪ Выключен"
 
-            if is_active:
-                any_active = True
+        if is_active:
+            any_active = True
 
-            status_text += f"*{account_data['name']}*: {status}\n"
+        parts.append(f"*{account_data.name}*: {status}\n")
 
     if not any_active:
-        status_text += "\n⚠️ *Мониторинг не активен ни для одного аккаунта!*\n"
-        status_text += "Нажмите на «Запустить мониторинг» или выберите отдельные аккаунты."
+        parts.append("\n⚠️ *Мониторинг не активен ни для одного аккаунта!*\n")
+        parts.append("Нажмите на «Запустить мониторинг» или выберите отдельные аккаунты.")
     else:
-        status_text += "\n✅ *Мониторинг активен*\n"
-        status_text += "Сообщения о новых отгрузках будут отправляться в настроенный канал."
-
-    await callback.bot.edit_message_text(
-        chat_id=user_id,
-        message_id=message_id,
-        text=status_text,
-        reply_markup=get_back_to_shipment_keyboard(),
-        parse_mode=ParseMode.MARKDOWN
-    )
+        parts.append("\n✅ *Мониторинг активен*\n")
+        parts.append("Сообщения о новых отгрузках будут отправляться в настроенный канал.")
+
+    status_text = "".join(parts)
 
-@router.callback_query(lambda c: c.data == "shipment_help")
+    await safe_edit(callback, status_text, reply_markup=get_back_to_shipment_keyboard())
+
+@router.callback_query(F.data == "shipment_help")
 async def callback_shipment_help(callback: CallbackQuery):
     """Handler for help button"""
     await callback.answer()
-    user_id = callback.from_user.id
-    message_id = callback.message.message_id
 
-    help_text = (
-        "❓ *Справка по работе с отгрузками*\n\n"
-        "*Мониторинг отгрузок* позволяет в реальном времени отслеживать процесс отгрузки товаров на Wildberries.\n\n"
-        "*Основные функции:*\n\n"
-        "▶️ *Запустить мониторинг* - начать мониторинг всех включенных аккаунтов\n"
-        "⏸ *Остановить мониторинг* - прекратить мониторинг всех аккаунтов\n"
-        "⚙️ *Выбрать аккаунты* - включить/выключить мониторинг отдельных аккаунтов\n\n"
-        "*Как работает мониторинг:*\n\n"
-        "1. Бот проверяет новые отгрузки каждые 60 секунд\n"
-        "2. При обнаружении новой отгрузки, создается сообщение с информацией\n"
-        "3. Статус отгрузки обновляется каждые 10 секунд в реальном времени\n"
-        "4. Когда отгрузка завершается, она перемещается в отдельный топик/канал\n\n"
-        "*Сообщения отправляются:*\n"
-        "- Активные отгрузки - в основной канал/топик\n"
-        "- Завершенные отгрузки - в отдельный топик или второй канал\n\n"
-        "⚠️ Для работы мониторинга бот должен быть запущен. Если бот был перезапущен, необходимо заново включить мониторинг."
-    )
-
-    await callback.bot.edit_message_text(
-        chat_id=user_id,
-        message_id=message_id,
-        text=help_text,
-        reply_markup=get_back_to_shipment_keyboard(),
-        parse_mode=ParseMode.MARKDOWN
-    )
+    await safe_edit(callback, _HELP_TEXT, reply_markup=get_back_to_shipment_keyboard())
 
-@router.callback_query(lambda c: c.data == "shipment_start_all")
+@router.callback_query(F.data == "shipment_start_all")
 async def callback_shipment_start_all(callback: CallbackQuery):
     """Handler for start all monitoring button"""
     await callback.answer("Запуск мониторинга...")
-    user_id = callback.from_user.id
-    message_id = callback.message.message_id
 
     # Update message to show progress
-    await callback.bot.edit_message_text(
-        chat_id=user_id,
-        message_id=message_id,
-        text="🔄 Запуск мониторинга для всех аккаунтов...\n\nПожалуйста, подождите.",
-        parse_mode=ParseMode.MARKDOWN
-    )
+    await safe_edit(callback, _STARTING_TEXT)
 
     # Start monitoring for all enabled accounts
-    started = 0
-    already_running = 0
-    errors = 0
-
-    for account_id, account_data in accounts.items():
-        if account_data['enabled']['shipment']:
-            if is_monitoring_active(account_id):
-                already_running += 1
-                continue
-
-            success = start_monitoring(callback.bot, account_id)
-            if success:
-                started += 1
-            else:
-                errors += 1
+    started, already_running, errors = start_all_enabled(callback.bot)
 
     # Show result
-    result_text = f"✅ *Мониторинг отгрузок запущен*\n\n"
+    parts = ["✅ *Мониторинг отгрузок запущен*\n\n"]
 
     if started > 0:
-        result_text += f"Запущено для {started} аккаунтов\n"
+        parts.append(f"Запущено для {started} аккаунтов\n")
 
     if already_running > 0:
-        result_text += f"Уже запущено для {already_running} аккаунтов\n"
+        parts.append(f"Уже запущено для {already_running} аккаунтов\n")
 
     if errors > 0:
-        result_text += f"Ошибки при запуске для {errors} аккаунтов\n"
-
-    await callback.bot.edit_message_text(
-        chat_id=user_id,
-        message_id=message_id,
-        text=result_text,
-        reply_markup=get_back_to_shipment_keyboard(),
-        parse_mode=ParseMode.MARKDOWN
-    )
+        parts.append(f"Ошибки при запуске для {errors} аккаунтов\n")
+
+    result_text = "".join(parts)
 
-@router.callback_query(lambda c: c.data == "shipment_stop_all")
+    await safe_edit(callback, result_text, reply_markup=get_back_to_shipment_keyboard())
+
+@router.callback_query(F.data == "shipment_stop_all")
 async def callback_shipment_stop_all(callback: CallbackQuery):
     """Handler for stop all monitoring button"""
     await callback.answer("Остановка мониторинга...")
-    user_id = callback.from_user.id
-    message_id = callback.message.message_id
 
     # Update message to show progress
-    await callback.bot.edit_message_text(
-        chat_id=user_id,
-        message_id=message_id,
-        text="🔄 Остановка мониторинга для всех аккаунтов...\n\nПожалуйста, подождите.",
-        parse_mode=ParseMode.MARKDOWN
-    )
+    await safe_edit(callback, _STOPPING_TEXT)
 
     # Stop all monitoring
     stop_all_monitoring()
 
     # Show result
-    result_text = "⏹ *Мониторинг отгрузок остановлен*\n\n"
-    result_text += "Мониторинг всех аккаунтов успешно остановлен.\n"
-    result_text += "Для возобновления мониторинга нажмите «Запустить мониторинг»."
-
-    await callback.bot.edit_message_text(
-        chat_id=user_id,
-        message_id=message_id,
-        text=result_text,
-        reply_markup=get_back_to_shipment_keyboard(),
-        parse_mode=ParseMode.MARKDOWN
-    )
+    await safe_edit(callback, _STOP_ALL_TEXT, reply_markup=get_back_to_shipment_keyboard())
 
-@router.callback_query(lambda c: c.data == "shipment_select_accounts")
+@router.callback_query(F.data == "shipment_select_accounts")
 async def callback_shipment_select_accounts(callback: CallbackQuery):
     """Handler for select accounts button"""
     await callback.answer()
-    user_id = callback.from_user.id
-    message_id = callback.message.message_id
 
     # Show account selection menu
-    accounts_text = (
-        "⚙️ *Выбор аккаунтов для мониторинга*\n\n"
-        "Нажмите на аккаунт, чтобы включить/выключить его мониторинг:\n\n"
-        "🟢 Включен - мониторинг активен\n"
-        "⚪ Выключен - мониторинг не активен\n"
-    )
+    await safe_edit(callback, _account_selection_text(), reply_markup=get_account_selection_keyboard())
 
-    await callback.bot.edit_message_text(
-        chat_id=user_id,
-        message_id=message_id,
-        text=accounts_text,
-        reply_markup=get_account_selection_keyboard(),
-        parse_mode=ParseMode.MARKDOWN
-    )
-
-@router.callback_query(lambda c: c.data.startswith("shipment_start_account_"))
+@router.callback_query(F.data.startswith(_START_PREFIX))
 async def callback_shipment_start_account(callback: CallbackQuery):
     """Handler for start monitoring for specific account"""
     await callback.answer("Запуск мониторинга...")
-    user_id = callback.from_user.id
-    message_id = callback.message.message_id
 
     # Extract account ID from callback data
-    account_id = callback.data.replace("shipment_start_account_", "")
+    account_id = callback.data[_START_LEN:]
 
-    if account_id in accounts and accounts[account_id]['enabled']['shipment']:
+    if account_id in _enabled_ids():
         # Start monitoring for the account
         success = start_monitoring(callback.bot, account_id)
 
         # Update account selection menu
-        accounts_text = (
-            "⚙️ *Выбор аккаунтов для мониторинга*\n\n"
-            "Нажмите на аккаунт, чтобы включить/выключить его мониторинг:\n\n"
-            "🟢 Включен - мониторинг активен\n"
-            "⚪ Выключен - мониторинг не активен\n"
-        )
-
         if success:
-            accounts_text += f"\n✅ Мониторинг для аккаунта *{accounts[account_id]['name']}* успешно запущен."
+            accounts_text = _account_selection_text(
+                f"\n✅ Мониторинг для аккаунта *{accounts[account_id].name}* успешно запущен."
+            )
         else:
-            accounts_text += f"\n⚠️ Ошибка запуска мониторинга для аккаунта *{accounts[account_id]['name']}*."
+            accounts_text = _account_selection_text(
+                f"\n⚠️ Ошибка запуска мониторинга для аккаунта *{accounts[account_id].name}*."
+            )
 
-        await callback.bot.edit_message_text(
-            chat_id=user_id,
-            message_id=message_id,
-            text=accounts_text,
-            reply_markup=get_account_selection_keyboard(),
-            parse_mode=ParseMode.MARKDOWN
-        )
+        await safe_edit(callback, accounts_text, reply_markup=get_account_selection_keyboard())
 
-@router.callback_query(lambda c: c.data.startswith("shipment_stop_account_"))
+@router.callback_query(F.data.startswith(_STOP_PREFIX))
 async def callback_shipment_stop_account(callback: CallbackQuery):
     """Handler for stop monitoring for specific account"""
     await callback.answer("Остановка мониторинга...")
-    user_id = callback.from_user.id
-    message_id = callback.message.message_id
 
     # Extract account ID from callback data
-    account_id = callback.data.replace("shipment_stop_account_", "")
+    account_id = callback.data[_STOP_LEN:]
 
-    if account_id in accounts and accounts[account_id]['enabled']['shipment']:
+    if account_id in _enabled_ids():
         # Stop monitoring for the account
         success = stop_monitoring(account_id)
 
         # Update account selection menu
-        accounts_text = (
-            "⚙️ *Выбор аккаунтов для мониторинга*\n\n"
-            "Нажмите на аккаунт, чтобы включить/выключить его мониторинг:\n\n"
-            "🟢 Включен - мониторинг активен\n"
-            "⚪ Выключен - мониторинг не активен\n"
-        )
-
         if success:
-            accounts_text += f"\n⏹ Мониторинг для аккаунта *{accounts[account_id]['name']}* остановлен."
+            accounts_text = _account_selection_text(
+                f"\n⏹ Мониторинг для аккаунта *{accounts[account_id].name}* остановлен."
+            )
         else:
-            accounts_text += f"\n⚠️ Ошибка остановки мониторинга для аккаунта *{accounts[account_id]['name']}*."
+            accounts_text = _account_selection_text(
+                f"\n⚠️ Ошибка остановки мониторинга для аккаунта *{accounts[account_id].name}*."
+            )
 
-        await callback.bot.edit_message_text(
-            chat_id=user_id,
-            message_id=message_id,
-            text=accounts_text,
-            reply_markup=get_account_selection_keyboard(),
-            parse_mode=ParseMode.MARKDOWN
-        )
+        await safe_edit(callback, accounts_text, reply_markup=get_account_selection_keyboard())
 
 # Command handlers
 @router.message(Command("monitor"))
@@ -405,35 +436,23 @@ async def cmd_monitor(message: Message):
     user_id = message.from_user.id
 
     # Start monitoring for all enabled accounts
-    started = 0
-    already_running = 0
-    errors = 0
-
-    for account_id, account_data in accounts.items():
-        if account_data['enabled']['shipment']:
-            if is_monitoring_active(account_id):
-                already_running += 1
-                continue
-
-            success = start_monitoring(message.bot, account_id)
-            if success:
-                started += 1
-            else:
-                errors += 1
+    started, already_running, errors = start_all_enabled(message.bot)
 
     # Show result
-    result_text = f"✅ *Мониторинг отгрузок запущен*\n\n"
+    parts = ["✅ *Мониторинг отгрузок запущен*\n\n"]
 
     if started > 0:
-        result_text += f"Запущено для {started} аккаунтов\n"
+        parts.append(f"Запущено для {started} аккаунтов\n")
 
     if already_running > 0:
-        result_text += f"Уже запущено для {already_running} аккаунтов\n"
+        parts.append(f"Уже запущено для {already_running} аккаунтов\n")
 
     if errors > 0:
-        result_text += f"Ошибки при запуске для {errors} аккаунтов\n"
+        parts.append(f"Ошибки при запуске для {errors} аккаунтов\n")
+
+    result_text = "".join(parts)
 
-    await message.answer(result_text, parse_mode=ParseMode.MARKDOWN)
+    await message.answer(result_text, parse_mode=_PM)
 
 @router.message(Command("stop"))
 async def cmd_stop(message: Message):
@@ -444,11 +463,7 @@ async def cmd_stop(message: Message):
     stop_all_monitoring()
 
     # Show result
-    result_text = "⏹ *Мониторинг отгрузок остановлен*\n\n"
-    result_text += "Мониторинг всех аккаунтов успешно остановлен.\n"
-    result_text += "Для возобновления мониторинга используйте команду /monitor или нажмите «Запустить мониторинг» в меню."
-
-    await message.answer(result_text, parse_mode=ParseMode.MARKDOWN)
+    await message.answer(_STOP_CMD_TEXT, parse_mode=_PM)
 
 @router.message(Command("status"))
 async def cmd_status(message: Message):
@@ -456,25 +471,26 @@ async def cmd_status(message: Message):
     user_id = message.from_user.id
 
     # Build status message
-    status_text = "📊 *Статус мониторинга отгрузок*\n\n"
+    parts = ["📊 *Статус мониторинга отгрузок*\n\n"]
 
     any_active = False
 
-    for account_id, account_data in accounts.items():
-        if account_data['enabled']['shipment']:
-            is_active = is_monitoring_active(account_id)
-            status = "🟢 Включен" if is_active else "⚪ Выключен"
+    for account_id, account_data in _enabled_accounts():
+        is_active = is_monitoring_active(account_id)
+        status = "🟢 Включен" if is_active else "⚪ Выключен"
 
-            if is_active:
-                any_active = True
+        if is_active:
+            any_active = True
 
-            status_text += f"*{account_data['name']}*: {status}\n"
+        parts.append(f"*{account_data.name}*: {status}\n")
 
     if not any_active:
-        status_text += "\n⚠️ *Мониторинг не активен ни для одного аккаунта!*\n"
-        status_text += "Используйте команду /monitor для запуска мониторинга."
+        parts.append("\n⚠️ *Мониторинг не активен ни для одного аккаунта!*\n")
+        parts.append("Используйте команду /monitor для запуска мониторинга.")
     else:
-        status_text += "\n✅ *Мониторинг активен*\n"
-        status_text += "Сообщения о новых отгрузках отправляются в настроенный канал."
+        parts.append("\n✅ *Мониторинг активен*\n")
+        parts.append("Сообщения о новых отгрузках отправляются в настроенный канал.")
+
+    status_text = "".join(parts)
 
-    await message.answer(status_text, parse_mode=ParseMode.MARKDOWN)
\ No newline at end of file
+    await message.answer(status_text, parse_mode=_PM)
\ No newline at end of file
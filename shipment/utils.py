@@ -2,13 +2,53 @@
 Utilities for Shipment module
 Provides helper functions for shipment monitoring
 """
+import json
 import logging
+from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from utils.datetime_util import parse_iso_datetime
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+@dataclass(slots=True)
+class ShipmentInfo:
+    """Grouped information about shipment progress"""
+    shipment_id: Optional[int]
+    state: Optional[str]
+    vehicle: str
+    responsible: str
+    created_at: Optional[datetime]
+    closed_at: Optional[datetime]
+    duration: Optional[timedelta]
+    max_boxes: int
+    max_items: int
+    scanned_boxes: int
+    scanned_items: int
+    remaining_items: int
+    box_percentage: float
+    item_percentage: float
+
+# Number of blocks in progress bar
+PROGRESS_BLOCKS = 10
+
+# Progress bars for every fill level, built once
+_BARS = tuple('🟩' * filled + '⬜' * (PROGRESS_BLOCKS - filled) for filled in range(PROGRESS_BLOCKS + 1))
+
+# Date format in shipment messages
+DATETIME_FORMAT = '%d.%m.%Y %H:%M:%S'
+
+# Cached since the same shipment is polled every tick, uses ciso8601 when installed
+_parse_iso = lru_cache(maxsize=4096)(parse_iso_datetime)
+
 def is_new_shipment(shipment: Dict, monitoring_start_time: datetime) -> bool:
     """
     Check if shipment is new (created after monitoring started)
@@ -28,48 +68,28 @@ def is_new_shipment(shipment: Dict, monitoring_start_time: datetime) -> bool:
         return False
 
     try:
-        created_at = datetime.fromisoformat(created_at_str.replace('Z', '+00:00'))
+        created_at = _parse_iso(created_at_str)
         return created_at > monitoring_start_time
     except (ValueError, TypeError):
         logger.error(f"Error parsing shipment creation date: {created_at_str}")
         return False
 
-def calculate_max_stats(shipment: Dict) -> Dict[str, int]:
+def shipment_payload_hash(shipment: Dict) -> int:
     """
-    Calculate maximum stats (boxes, items) from shipment data
+    Get hash of shipment details payload to detect unchanged shipments
 
     Args:
-        shipment: Shipment data
+        shipment: Shipment details
 
     Returns:
-        Dictionary with max stats
+        Hash of payload content
     """
-    max_stats = {
-        'max_boxes': 0,
-        'max_items': 0
-    }
-
-    # Calculate from transfers
-    transfers = shipment.get('transfers', [])
-    for transfer in transfers:
-        box_count = transfer.get('box_count', 0)
-        item_count = transfer.get('item_count', 0)
-
-        max_stats['max_boxes'] += box_count
-        max_stats['max_items'] += item_count
-
-    # Add tares (warehouse boxes)
-    tares = shipment.get('tares', [])
-    for tare in tares:
-        box_count = 1  # Each tare is one box
-        item_count = tare.get('item_count', 0)
+    if orjson is not None:
+        return hash(orjson.dumps(shipment, option=orjson.OPT_SORT_KEYS))
+    return hash(json.dumps(shipment, sort_keys=True, default=str))
 
-        max_stats['max_boxes'] += box_count
-        max_stats['max_items'] += item_count
-
-    return max_stats
-
-def has_progress_changed(shipment_id: int, current_progress: Dict, last_progress: Dict) -> bool:
+def has_progress_changed(shipment_id: int, current_progress: ShipmentInfo,
+                         last_progress: Dict[int, ShipmentInfo]) -> bool:
     """
     Check if shipment progress has changed significantly
 
@@ -81,30 +101,16 @@ def has_progress_changed(shipment_id: int, current_progress: Dict, last_progress
     Returns:
         True if progress has changed, False otherwise
     """
-    if shipment_id not in last_progress:
-        return True
-
-    # Check if state changed
-    if current_progress.get('state') != last_progress[shipment_id].get('state'):
-        return True
-
-    # Check if scanned boxes count changed
-    current_boxes = current_progress.get('scanned_boxes', 0)
-    last_boxes = last_progress[shipment_id].get('scanned_boxes', 0)
-
-    if current_boxes != last_boxes:
-        return True
-
-    # Check if scanned items count changed
-    current_items = current_progress.get('scanned_items', 0)
-    last_items = last_progress[shipment_id].get('scanned_items', 0)
-
-    if current_items != last_items:
+    last = last_progress.get(shipment_id)
+    if last is None:
         return True
 
-    return False
+    # Changed if state, scanned boxes or scanned items differ
+    return (current_progress.state != last.state
+            or current_progress.scanned_boxes != last.scanned_boxes
+            or current_progress.scanned_items != last.scanned_items)
 
-def update_last_progress(shipment_id: int, progress: Dict, last_progress: Dict) -> None:
+def update_last_progress(shipment_id: int, progress: ShipmentInfo, last_progress: Dict[int, ShipmentInfo]) -> None:
     """
     Update last progress data
 
@@ -115,52 +121,56 @@ def update_last_progress(shipment_id: int, progress: Dict, last_progress: Dict)
     """
     last_progress[shipment_id] = progress
 
-def get_shipment_grouped_info(shipment: Dict, max_stats: Dict) -> Dict:
+def summarize_shipment(shipment: Dict) -> ShipmentInfo:
     """
-    Get grouped information about shipment progress
+    Get grouped information about shipment progress in a single pass
 
     Args:
         shipment: Shipment data
-        max_stats: Maximum stats
 
     Returns:
-        Dictionary with grouped information
+        Grouped shipment information
     """
-    # Calculate current progress
+    max_boxes = 0
+    max_items = 0
     scanned_boxes = 0
     scanned_items = 0
     remaining_items = 0
 
-    # Count from transfers
-    transfers = shipment.get('transfers', [])
-    for transfer in transfers:
-        scanned_boxes += transfer.get('box_scanned', 0)
-        scanned_items += transfer.get('item_scanned', 0)
-        remaining_items += transfer.get('remain_count', 0)
-
-    # Add tares (warehouse boxes)
-    tares = shipment.get('tares', [])
-    for tare in tares:
+    # Count totals and progress from transfers
+    for transfer in shipment.get('transfers', []):
+        get = transfer.get
+        max_boxes += get('box_count', 0)
+        max_items += get('item_count', 0)
+        scanned_boxes += get('box_scanned', 0)
+        scanned_items += get('item_scanned', 0)
+        remaining_items += get('remain_count', 0)
+
+    # Add tares (warehouse boxes), each tare is one box
+    for tare in shipment.get('tares', []):
+        item_count = tare.get('item_count', 0)
+        max_boxes += 1
+        max_items += item_count
         if tare.get('is_scanned', False):
             scanned_boxes += 1
-            scanned_items += tare.get('item_count', 0)
+            scanned_items += item_count
 
     # Calculate percentages
     box_percentage = 0
     item_percentage = 0
 
-    if max_stats['max_boxes'] > 0:
-        box_percentage = round((scanned_boxes / max_stats['max_boxes']) * 100, 1)
+    if max_boxes > 0:
+        box_percentage = round((scanned_boxes / max_boxes) * 100, 1)
 
-    if max_stats['max_items'] > 0:
-        item_percentage = round((scanned_items / max_stats['max_items']) * 100, 1)
+    if max_items > 0:
+        item_percentage = round((scanned_items / max_items) * 100, 1)
 
     # Format times
     created_at = None
     created_at_str = shipment.get('created_at')
     if created_at_str:
         try:
-            created_at = datetime.fromisoformat(created_at_str.replace('Z', '+00:00'))
+            created_at = _parse_iso(created_at_str)
         except (ValueError, TypeError):
             logger.error(f"Error parsing shipment creation date: {created_at_str}")
 
@@ -168,7 +178,7 @@ def get_shipment_grouped_info(shipment: Dict, max_stats: Dict) -> Dict:
     closed_at_str = shipment.get('closed_at')
     if closed_at_str:
         try:
-            closed_at = datetime.fromisoformat(closed_at_str.replace('Z', '+00:00'))
+            closed_at = _parse_iso(closed_at_str)
         except (ValueError, TypeError):
             logger.error(f"Error parsing shipment closing date: {closed_at_str}")
 
@@ -178,24 +188,24 @@ def get_shipment_grouped_info(shipment: Dict, max_stats: Dict) -> Dict:
         duration = closed_at - created_at
 
     # Gather result
-    return {
-        'shipment_id': shipment.get('id'),
-        'state': shipment.get('state'),
-        'vehicle': shipment.get('car_number', 'N/A'),
-        'responsible': shipment.get('responsible', 'N/A'),
-        'created_at': created_at,
-        'closed_at': closed_at,
-        'duration': duration,
-        'max_boxes': max_stats['max_boxes'],
-        'max_items': max_stats['max_items'],
-        'scanned_boxes': scanned_boxes,
-        'scanned_items': scanned_items,
-        'remaining_items': remaining_items,
-        'box_percentage': box_percentage,
-        'item_percentage': item_percentage
-    }
-
-def format_progress_message(account_name: str, info: Dict) -> str:
+    return ShipmentInfo(
+        shipment_id=shipment.get('id'),
+        state=shipment.get('state'),
+        vehicle=shipment.get('car_number', 'N/A'),
+        responsible=shipment.get('responsible', 'N/A'),
+        created_at=created_at,
+        closed_at=closed_at,
+        duration=duration,
+        max_boxes=max_boxes,
+        max_items=max_items,
+        scanned_boxes=scanned_boxes,
+        scanned_items=scanned_items,
+        remaining_items=remaining_items,
+        box_percentage=box_percentage,
+        item_percentage=item_percentage
+    )
+
+def format_progress_message(account_name: str, info: ShipmentInfo) -> str:
     """
     Format message for active shipment
 
@@ -207,36 +217,31 @@ def format_progress_message(account_name: str, info: Dict) -> str:
         Formatted message
     """
     # Progress bar (10 blocks)
-    progress_blocks = 10
-    filled_blocks = round(info['box_percentage'] / 10)
-    if filled_blocks > progress_blocks:
-        filled_blocks = progress_blocks
-
-    progress_bar = '🟩' * filled_blocks + '⬜' * (progress_blocks - filled_blocks)
+    progress_bar = _BARS[min(PROGRESS_BLOCKS, max(0, round(info.box_percentage / 10)))]
 
     # Format times
     created_at_str = "N/A"
-    if info['created_at']:
-        created_at_str = info['created_at'].strftime('%d.%m.%Y %H:%M:%S')
+    if info.created_at:
+        created_at_str = info.created_at.strftime(DATETIME_FORMAT)
 
     # Build message
     message = (
-        f"🟢 [{account_name}] Отгрузка #{info['shipment_id']} - Активная\n\n"
-        f"Статус: {info['state']}\n"
-        f"Ответственный: {info['responsible']}\n"
-        f"Транспорт: {info['vehicle']}\n"
+        f"🟢 [{account_name}] Отгрузка #{info.shipment_id} - Активная\n\n"
+        f"Статус: {info.state}\n"
+        f"Ответственный: {info.responsible}\n"
+        f"Транспорт: {info.vehicle}\n"
         f"Создана: {created_at_str}\n\n"
         f"📦 ДАННЫЕ ОТГРУЗКИ:\n"
-        f"Всего товаров: {info['max_items']} шт.\n"
-        f"Всего коробок: {info['max_boxes']} шт.\n"
-        f"Отсканировано товаров: {info['scanned_items']}/{info['max_items']}\n"
-        f"Отсканировано: {info['scanned_boxes']}/{info['max_boxes']} шт. ({info['box_percentage']}%)\n"
+        f"Всего товаров: {info.max_items} шт.\n"
+        f"Всего коробок: {info.max_boxes} шт.\n"
+        f"Отсканировано товаров: {info.scanned_items}/{info.max_items}\n"
+        f"Отсканировано: {info.scanned_boxes}/{info.max_boxes} шт. ({info.box_percentage}%)\n"
         f"Прогресс: {progress_bar}"
     )
 
     return message
 
-def format_completed_shipment(account_name: str, info: Dict) -> str:
+def format_completed_shipment(account_name: str, info: ShipmentInfo) -> str:
     """
     Format message for completed shipment
 
@@ -248,38 +253,38 @@ def format_completed_shipment(account_name: str, info: Dict) -> str:
         Formatted message
     """
     # Progress bar (always full for completed shipments)
-    progress_bar = '🟩' * 10
+    progress_bar = _BARS[PROGRESS_BLOCKS]
 
     # Format times
     created_at_str = "N/A"
-    if info['created_at']:
-        created_at_str = info['created_at'].strftime('%d.%m.%Y %H:%M:%S')
+    if info.created_at:
+        created_at_str = info.created_at.strftime(DATETIME_FORMAT)
 
     closed_at_str = "N/A"
-    if info['closed_at']:
-        closed_at_str = info['closed_at'].strftime('%d.%m.%Y %H:%M:%S')
+    if info.closed_at:
+        closed_at_str = info.closed_at.strftime(DATETIME_FORMAT)
 
     # Format duration
     duration_str = "N/A"
-    if info['duration']:
-        hours = info['duration'].seconds // 3600
-        minutes = (info['duration'].seconds % 3600) // 60
+    if info.duration:
+        hours = info.duration.seconds // 3600
+        minutes = (info.duration.seconds % 3600) // 60
         duration_str = f"{hours} ч. {minutes} мин."
 
     # Build message
     message = (
-        f"🔴 [{account_name}] Отгрузка #{info['shipment_id']} - Завершена\n\n"
-        f"Статус: {info['state']}\n"
-        f"Ответственный: {info['responsible']}\n"
-        f"Транспорт: {info['vehicle']}\n"
+        f"🔴 [{account_name}] Отгрузка #{info.shipment_id} - Завершена\n\n"
+        f"Статус: {info.state}\n"
+        f"Ответственный: {info.responsible}\n"
+        f"Транспорт: {info.vehicle}\n"
         f"Создана: {created_at_str}\n"
         f"Закрыта: {closed_at_str}\n\n"
         f"📦 ДАННЫЕ ОТГРУЗКИ:\n"
-        f"Всего товаров: {info['max_items']} шт.\n"
-        f"Всего коробок: {info['max_boxes']} шт.\n"
-        f"Оставшиеся товары: {info['remaining_items']} шт.\n"
-        f"Отсканировано товаров: {info['scanned_items']}/{info['max_items']}\n"
-        f"Отсканировано: {info['scanned_boxes']}/{info['max_boxes']} шт. ({info['box_percentage']}%)\n"
+        f"Всего товаров: {info.max_items} шт.\n"
+        f"Всего коробок: {info.max_boxes} шт.\n"
+        f"Оставшиеся товары: {info.remaining_items} шт.\n"
+        f"Отсканировано товаров: {info.scanned_items}/{info.max_items}\n"
+        f"Отсканировано: {info.scanned_boxes}/{info.max_boxes} шт. ({info.box_percentage}%)\n"
         f"Прогресс: {progress_bar}\n"
         f"Время отгрузки: {duration_str}"
     )
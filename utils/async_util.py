@@ -0,0 +1,28 @@
+"""
+Asyncio utilities for the combined WB bot
+Provides helpers for running many coroutines with bounded concurrency
+"""
+import asyncio
+from typing import Any, Awaitable, List
+
+
+async def gather_with_concurrency(limit: int, *coros: Awaitable,
+                                  return_exceptions: bool = False) -> List[Any]:
+    """
+    Run coroutines concurrently, but no more than limit at a time
+
+    Args:
+        limit: Maximum number of coroutines running at once
+        *coros: Coroutines to run
+        return_exceptions: Return exceptions as results instead of raising
+
+    Returns:
+        List of results in the same order as coros
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _run(coro: Awaitable) -> Any:
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(_run(coro) for coro in coros), return_exceptions=return_exceptions)
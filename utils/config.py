@@ -2,45 +2,141 @@
 Unified configuration and account management for the combined WB bot
 Loads data from .env file and manages accounts for both Ostatki PM and Shipment functionality
 """
+import functools
 import os
-from typing import Dict, List, Optional, Any
+import re
+import sys
+from types import MappingProxyType
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Set
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Snapshot of environment, read once instead of per os.getenv call
+_ENV = os.environ.copy()
+_get = _ENV.get
+
+
+def _int_env(name: str, default: int) -> int:
+    """Get integer environment variable, default is returned as is when unset"""
+    value = _get(name)
+    return default if value is None else int(value)
+
+
+# Account indices are taken from ACCOUNT{n}_NAME keys
+_ACC_RE = re.compile(r"^ACCOUNT(\d+)_NAME$")
+
 # Bot Configuration
-BOT_TOKEN = os.getenv("BOT_TOKEN")
+BOT_TOKEN = _get("BOT_TOKEN")
 if not BOT_TOKEN:
     raise ValueError("BOT_TOKEN not set in .env file")
 
 # Group/Channel Configuration
-GROUP_ID = os.getenv("GROUP_ID")
-CHANNEL_ID = os.getenv("CHANNEL_ID")
-LIVE_TOPIC_ID = int(os.getenv("LIVE_TOPIC_ID", "1"))
-COMPLETED_TOPIC_ID = int(os.getenv("COMPLETED_TOPIC_ID", "1"))
+GROUP_ID = _get("GROUP_ID")
+CHANNEL_ID = _get("CHANNEL_ID")
+LIVE_TOPIC_ID = _int_env("LIVE_TOPIC_ID", 1)
+COMPLETED_TOPIC_ID = _int_env("COMPLETED_TOPIC_ID", 1)
 
 # Additional channels for specific purposes
-COMPLETED_SHIPMENTS_CHANNEL = os.getenv("COMPLETED_SHIPMENTS_CHANNEL")
-ACTIVE_SHIPMENTS_CHANNEL = os.getenv("ACTIVE_SHIPMENTS_CHANNEL")
-RETENTIONS_GROUP = os.getenv("RETENTIONS_GROUP")
-RETENTIONS_TOPIC_ID = int(os.getenv("RETENTIONS_TOPIC_ID", "1"))
+COMPLETED_SHIPMENTS_CHANNEL = _get("COMPLETED_SHIPMENTS_CHANNEL")
+ACTIVE_SHIPMENTS_CHANNEL = _get("ACTIVE_SHIPMENTS_CHANNEL")
+RETENTIONS_GROUP = _get("RETENTIONS_GROUP")
+RETENTIONS_TOPIC_ID = _int_env("RETENTIONS_TOPIC_ID", 1)
 
 # Secondary channel configuration (optional)
-CHANNEL_ID2 = os.getenv("CHANNEL_ID2")
+CHANNEL_ID2 = _get("CHANNEL_ID2")
 if CHANNEL_ID2:
     CHANNEL_ID2 = int(CHANNEL_ID2)
 
 # Ostatki PM Configuration
-REPORT_INTERVAL_MINUTES = int(os.getenv("REPORT_INTERVAL_MINUTES", "10"))
-OSTATKI_PM_CHANNEL = os.getenv("OSTATKI_PM_CHANNEL")  # Канал для отчетов остатков ПМ
+REPORT_INTERVAL_MINUTES = _int_env("REPORT_INTERVAL_MINUTES", 10)
+OSTATKI_PM_CHANNEL = _get("OSTATKI_PM_CHANNEL")  # Канал для отчетов остатков ПМ
 
 # Shipment Monitoring Configuration
-CHECK_INTERVAL = int(os.getenv("CHECK_INTERVAL", "10"))
-REFRESH_INTERVAL = int(os.getenv("REFRESH_INTERVAL", "60"))
-INACTIVITY_TIMEOUT = int(os.getenv("INACTIVITY_TIMEOUT", "300"))
+CHECK_INTERVAL = _int_env("CHECK_INTERVAL", 10)
+REFRESH_INTERVAL = _int_env("REFRESH_INTERVAL", 60)
+INACTIVITY_TIMEOUT = _int_env("INACTIVITY_TIMEOUT", 300)
+
+# Maximum number of (user, message key) pairs remembered for menu updates
+MESSAGE_CACHE_SIZE = _int_env("MESSAGE_CACHE_SIZE", 10000)
+
+
+@dataclass(slots=True)
+class ShipmentState:
+    """Shipment monitoring credentials and per-account state"""
+    token: Optional[str] = field(default=None, repr=False)
+    bearer_token: Optional[str] = field(default=None, repr=False)  # Filled after authentication
+    token_exp: Optional[float] = None  # JWT exp of bearer_token, epoch seconds
+    token_retry_at: float = 0.0  # time.monotonic() before which expired token is not refreshed
+    office_ids: List[int] = field(default_factory=list)  # Shipment uses multiple office IDs
+    supplier_id: Optional[int] = None
+    monitored_shipments: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    last_progress: Dict[int, Any] = field(default_factory=dict)  # shipment.utils.ShipmentInfo values
+    message_ids: Dict[int, int] = field(default_factory=dict)
+    completed_shipments: Set[int] = field(default_factory=set)
+    processed_shipments: Set[int] = field(default_factory=set)
+    last_activity_time: Dict[int, float] = field(default_factory=dict)  # time.monotonic() timestamps
+
+
+@dataclass(slots=True)
+class OstatkiCfg:
+    """Ostatki PM credentials"""
+    token: Optional[str] = field(default=None, repr=False)
+    office_id: Optional[int] = None  # Ostatki PM uses single office ID
+
+
+@dataclass(slots=True)
+class RetentionsCfg:
+    """Retentions credentials"""
+    token: Optional[str] = field(default=None, repr=False)
+    supplier_id: Optional[str] = None
+    enabled: bool = False
+
+
+@dataclass(slots=True)
+class DefectsCfg:
+    """Defects credentials"""
+    token: Optional[str] = field(default=None, repr=False)
+    supplier_id: Optional[str] = None
+    enabled: bool = False
+
+
+@dataclass(slots=True)
+class EnabledFlags:
+    """Which bots are configured for the account"""
+    ostatki: bool = False
+    shipment: bool = False
+    retentions: bool = False
+    defects: bool = False
+
+
+@dataclass(slots=True)
+class AccountConfig:
+    """Account configuration shared by all bots"""
+    name: str
+    ostatki: OstatkiCfg
+    shipment: Optional[ShipmentState]  # None unless shipment monitoring is enabled
+    retentions: RetentionsCfg
+    defects: DefectsCfg
+    enabled: EnabledFlags
+
 
-def load_accounts() -> Dict[str, Dict[str, Any]]:
+def _parse_ids(value: str) -> List[int]:
+    """
+    Parse comma-separated list of integer IDs, e.g. "123, 456,"
+
+    Args:
+        value: Comma-separated IDs
+
+    Returns:
+        List of IDs, empty items are skipped
+    """
+    return [int(item) for item in value.replace(" ", "").split(",") if item]
+
+
+def load_accounts() -> Dict[str, AccountConfig]:
     """
     Load account configuration from .env file
     Each account can be used by both bots (Ostatki PM and Shipment)
@@ -50,118 +146,145 @@ def load_accounts() -> Dict[str, Dict[str, Any]]:
         ACCOUNT1_TOKEN=bearer_token_for_shipment
         ACCOUNT1_OFFICE_ID=123456,654321
         ACCOUNT1_SUPPLIER_ID=1234567
+    Accounts may be numbered with gaps, they are loaded in index order
 
     Returns:
-        Dict with account configurations
+        Dict of account configurations by account key
     """
     accounts = {}
-    account_num = 1
+    indices = sorted({int(match.group(1)) for key in _ENV if (match := _ACC_RE.match(key))})
 
-    while True:
+    for account_num in indices:
         account_key = f"account_{account_num}"
-        name = os.getenv(f"ACCOUNT{account_num}_NAME")
+        prefix = f"ACCOUNT{account_num}_"
+        name = _get(prefix + "NAME")
 
         # Tokens for both bots
-        ostatki_token = os.getenv(f"ACCOUNT{account_num}")
-        shipment_token = os.getenv(f"ACCOUNT{account_num}_TOKEN")
-        retentions_token = os.getenv(f"ACCOUNT{account_num}_RETENTIONS_TOKEN")
-        defects_token = os.getenv(f"ACCOUNT{account_num}_DEFECTS_TOKEN")
+        ostatki_token = _get(prefix[:-1])
+        shipment_token = _get(prefix + "TOKEN")
+        retentions_token = _get(prefix + "RETENTIONS_TOKEN")
+        defects_token = _get(prefix + "DEFECTS_TOKEN")
 
         # Office IDs (can be multiple, comma-separated)
-        office_id_str = os.getenv(f"ACCOUNT{account_num}_OFFICE_ID")
-        supplier_id = os.getenv(f"ACCOUNT{account_num}_SUPPLIER_ID")
-        retentions_supplier_id = os.getenv(f"ACCOUNT{account_num}_RETENTIONS_SUPPLIER_ID")
-        defects_supplier_id = os.getenv(f"ACCOUNT{account_num}_DEFECTS_SUPPLIER_ID")
+        office_id_str = _get(prefix + "OFFICE_ID")
+        supplier_id = _get(prefix + "SUPPLIER_ID")
+        retentions_supplier_id = _get(prefix + "RETENTIONS_SUPPLIER_ID")
+        defects_supplier_id = _get(prefix + "DEFECTS_SUPPLIER_ID")
 
-        # If no name or no tokens are found, we've reached the end of accounts
+        # Skip accounts without name or tokens
         if not name or (not ostatki_token and not shipment_token and not retentions_token and not defects_token):
-            break
+            continue
 
         # Parse office IDs
-        office_ids = []
-        if office_id_str:
-            office_ids = [int(oid.strip()) for oid in office_id_str.split(",") if oid.strip()]
+        office_ids = _parse_ids(office_id_str) if office_id_str else []
+
+        retentions_enabled = retentions_token is not None and retentions_supplier_id is not None
+        defects_enabled = defects_token is not None and defects_supplier_id is not None
+        shipment_enabled = bool(shipment_token and supplier_id and office_ids)
 
         # Create account structure
-        accounts[account_key] = {
-            "name": name,
-            "ostatki": {
-                "token": ostatki_token,
-                "office_id": office_ids[0] if office_ids else None  # Ostatki PM uses single office ID
-            },
-            "shipment": {
-                "token": shipment_token,
-                "bearer_token": None,  # Will be filled after authentication
-                "office_ids": office_ids,  # Shipment uses multiple office IDs
-                "supplier_id": int(supplier_id) if supplier_id else None,
-                "monitored_shipments": {},
-                "last_progress": {},
-                "message_ids": {},
-                "completed_shipments": set(),
-                "processed_shipments": set(),
-                "last_activity_time": {}
-            },
-            "retentions": {
-                "token": retentions_token,
-                "supplier_id": retentions_supplier_id,
-                "enabled": retentions_token is not None and retentions_supplier_id is not None
-            },
-            "defects": {
-                "token": defects_token,
-                "supplier_id": defects_supplier_id,
-                "enabled": defects_token is not None and defects_supplier_id is not None
-            },
-            "enabled": {
-                "ostatki": ostatki_token is not None,
-                "shipment": all([shipment_token, supplier_id, office_ids]),
-                "retentions": retentions_token is not None and retentions_supplier_id is not None,
-                "defects": defects_token is not None and defects_supplier_id is not None
-            }
-        }
-
-        account_num += 1
+        accounts[account_key] = AccountConfig(
+            name=name,
+            ostatki=OstatkiCfg(
+                token=ostatki_token,
+                office_id=office_ids[0] if office_ids else None
+            ),
+            shipment=ShipmentState(
+                token=shipment_token,
+                office_ids=office_ids,
+                supplier_id=int(supplier_id)
+            ) if shipment_enabled else None,
+            retentions=RetentionsCfg(
+                token=retentions_token,
+                supplier_id=retentions_supplier_id,
+                enabled=retentions_enabled
+            ),
+            defects=DefectsCfg(
+                token=defects_token,
+                supplier_id=defects_supplier_id,
+                enabled=defects_enabled
+            ),
+            enabled=EnabledFlags(
+                ostatki=ostatki_token is not None,
+                shipment=shipment_enabled,
+                retentions=retentions_enabled,
+                defects=defects_enabled
+            )
+        )
 
     return accounts
 
-# Load all accounts
-accounts = load_accounts()
+@functools.cache
+def get_accounts() -> Dict[str, AccountConfig]:
+    """
+    Load accounts on first use and print summary
 
-# Monitoring state for shipment bot
-account_monitoring = {account_id: False for account_id in accounts.keys()}
-monitoring_start_times = {account_id: None for account_id in accounts.keys()}
+    Returns:
+        Dict of account configurations by account key
+
+    Raises:
+        ValueError: If no accounts are configured
+    """
+    loaded = load_accounts()
+
+    # Print loaded accounts info in one write
+    lines = [f"Loaded {len(loaded)} accounts:"]
+    lines.extend(
+        f"  - {account_id}: {account_data.name}\n"
+        f"    Ostatki PM enabled: {account_data.enabled.ostatki}\n"
+        f"    Shipment enabled: {account_data.enabled.shipment}"
+        for account_id, account_data in loaded.items()
+    )
+    print("\n".join(lines))
+
+    # Check if we have any accounts
+    if not loaded:
+        raise ValueError("No accounts found in .env file. Check format: ACCOUNT1_*, ACCOUNT2_*, ...")
+
+    return loaded
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Lazily create account globals on first access (PEP 562)
+    accounts, account_monitoring and monitoring_start_times are loaded only
+    when a module actually imports them
+    """
+    if name == "accounts":
+        value = get_accounts()
+    elif name == "account_monitoring":
+        # Monitoring state for shipment bot
+        value = {account_id: False for account_id in get_accounts()}
+    elif name == "monitoring_start_times":
+        value = {account_id: None for account_id in get_accounts()}
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Print loaded accounts info
-print(f"Loaded {len(accounts)} accounts:")
-for account_id, account_data in accounts.items():
-    print(f"  - {account_id}: {account_data['name']}")
-    print(f"    Ostatki PM enabled: {account_data['enabled']['ostatki']}")
-    print(f"    Shipment enabled: {account_data['enabled']['shipment']}")
+    globals()[name] = value
+    return value
 
-# Check if we have any accounts
-if not accounts:
-    raise ValueError("No accounts found in .env file. Check format: ACCOUNT1_*, ACCOUNT2_*, ...")
 
-# Fixed data for Ostatki PM
+# Fixed data for Ostatki PM (read-only, copy before modifying)
 # Словарь с фиксированными значениями нормы количества ШК для каждого маршрута
-SHK_NORMS = {
+SHK_NORMS = MappingProxyType({
     10194: 1158,
     20359: 1186,
     25025: 1123,
     25321: 1112,
     30449: 1147
-}
+})
 
 # Словарь с фиксированными значениями нормы литров для каждого маршрута
-FUEL_NORMS = {
+FUEL_NORMS = MappingProxyType({
     10194: 4502.31,
     20359: 4676.61,
     25025: 4258.41,
     25321: 4269.49,
     30449: 4425.83
-}
+})
 
 # Фиксированные значения для парковок по маршрутам
-FIXED_PARKING = {
+FIXED_PARKING = MappingProxyType({route_id: sys.intern(parking) for route_id, parking in {
     10194: '20',
     20359: '13',
     25025: '36',
@@ -173,4 +296,4 @@ FIXED_PARKING = {
     29738: '120',
     29767: '20',
     30449: '73'
-}
\ No newline at end of file
+}.items()})
\ No newline at end of file
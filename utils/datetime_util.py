@@ -0,0 +1,31 @@
+"""
+Date/time utilities for the combined WB bot
+Provides a fast parser for ISO-8601 timestamps returned by WB APIs
+"""
+from datetime import datetime
+
+try:
+    # C extension, handles the trailing 'Z' natively
+    from ciso8601 import parse_datetime as _parse_datetime
+except ImportError:
+    _parse_datetime = None
+
+
+def parse_iso_datetime(value: str) -> datetime:
+    """
+    Parse ISO-8601 timestamp (e.g. 2024-01-01T10:00:00.123456Z)
+
+    Uses ciso8601 when installed and falls back to datetime.fromisoformat
+
+    Args:
+        value: Timestamp string
+
+    Returns:
+        Parsed datetime
+
+    Raises:
+        ValueError: If the string is not a valid timestamp
+    """
+    if _parse_datetime is not None:
+        return _parse_datetime(value)
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
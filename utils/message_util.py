@@ -3,17 +3,30 @@ Message utilities for the combined WB bot
 Provides helper functions for message updating and management
 """
 import logging
-from typing import Dict, Any, Optional
+import asyncio
+from typing import List, Optional, Tuple
 
 from aiogram import Bot
 from aiogram.types import InlineKeyboardMarkup
 from aiogram.enums import ParseMode
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest, TelegramRetryAfter
+from cachetools import LRUCache
+
+from utils.async_util import gather_with_concurrency
+from utils.config import MESSAGE_CACHE_SIZE
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 # Message state storage - for tracking and updating messages
-messages: Dict[int, Dict[str, Any]] = {}
+# Keyed by (user_id, message_key), least recently used pairs are evicted
+messages: LRUCache = LRUCache(maxsize=MESSAGE_CACHE_SIZE)
+
+# Edit errors after which a new message is sent instead
+_RESEND_REASONS = ("message to edit not found", "message can't be edited")
+
+# Maximum number of messages updated at once, Telegram allows ~30 messages per second
+BULK_CONCURRENCY = 30
 
 async def update_message(
     bot: Bot,
@@ -37,55 +50,125 @@ async def update_message(
         parse_mode: Parse mode for message formatting
 
     Returns:
-        Message ID (either updated or new)
+        Message ID (either updated or new) or None on Telegram error
     """
     # Determine message ID to update
     msg_id = message_id
 
     # If no message_id is provided but we have a message_key, try to get stored message ID
-    if not msg_id and message_key and user_id in messages:
-        msg_id = messages.get(user_id, {}).get(message_key)
+    if not msg_id and message_key:
+        msg_id = messages.get((user_id, message_key))
 
     if msg_id:
         # Try to update existing message
         try:
-            await bot.edit_message_text(
-                chat_id=user_id,
-                message_id=msg_id,
-                text=text,
-                reply_markup=reply_markup,
-                parse_mode=parse_mode
-            )
+            try:
+                await bot.edit_message_text(
+                    chat_id=user_id,
+                    message_id=msg_id,
+                    text=text,
+                    reply_markup=reply_markup,
+                    parse_mode=parse_mode
+                )
+            except TelegramRetryAfter as e:
+                # Flood control, wait and retry once
+                logger.warning(f"Flood control on updating message, retry in {e.retry_after}s")
+                await asyncio.sleep(e.retry_after)
+                await bot.edit_message_text(
+                    chat_id=user_id,
+                    message_id=msg_id,
+                    text=text,
+                    reply_markup=reply_markup,
+                    parse_mode=parse_mode
+                )
 
             # Store the message ID if message_key is provided
             if message_key:
-                if user_id not in messages:
-                    messages[user_id] = {}
-                messages[user_id][message_key] = msg_id
+                messages[user_id, message_key] = msg_id
 
             return msg_id
 
-        except Exception as e:
+        except TelegramBadRequest as e:
+            reason = e.message.lower()
+            if "message is not modified" in reason:
+                # Message already shows this content
+                if message_key:
+                    messages[user_id, message_key] = msg_id
+                return msg_id
+            if not any(r in reason for r in _RESEND_REASONS):
+                logger.error(f"Error updating message: {e}")
+                return None
+            # Fall through to send new message
+
+        except TelegramRetryAfter as e:
+            # Sending a new message would hit flood control as well
+            logger.error(f"Error updating message: {e}")
+            return None
+
+        except TelegramAPIError as e:
             logger.error(f"Error updating message: {e}")
             # Fall through to send new message
 
     # If update fails or no message ID is provided, send a new message
     try:
-        sent_message = await bot.send_message(
-            chat_id=user_id,
-            text=text,
-            reply_markup=reply_markup,
-            parse_mode=parse_mode
-        )
+        try:
+            sent_message = await bot.send_message(
+                chat_id=user_id,
+                text=text,
+                reply_markup=reply_markup,
+                parse_mode=parse_mode
+            )
+        except TelegramRetryAfter as e:
+            # Flood control, wait and retry once
+            logger.warning(f"Flood control on sending message, retry in {e.retry_after}s")
+            await asyncio.sleep(e.retry_after)
+            sent_message = await bot.send_message(
+                chat_id=user_id,
+                text=text,
+                reply_markup=reply_markup,
+                parse_mode=parse_mode
+            )
 
         # Store the message ID if message_key is provided
         if message_key:
-            if user_id not in messages:
-                messages[user_id] = {}
-            messages[user_id][message_key] = sent_message.message_id
+            messages[user_id, message_key] = sent_message.message_id
 
         return sent_message.message_id
 
-    except Exception as e:
+    except TelegramAPIError as e:
         logger.error(f"Error sending new message: {e}")
-        return None
\ No newline at end of file
+        return None
+
+async def update_messages_bulk(
+    bot: Bot,
+    jobs: List[Tuple[int, str, Optional[InlineKeyboardMarkup]]],
+    message_key: str = None,
+    parse_mode: str = ParseMode.MARKDOWN
+) -> List[Optional[int]]:
+    """
+    Update or send messages for several users concurrently
+
+    Args:
+        bot: Bot instance
+        jobs: List of (user_id, text, reply_markup)
+        message_key: Key for storing the message IDs in the messages dict
+        parse_mode: Parse mode for message formatting
+
+    Returns:
+        Message IDs in the same order as jobs, None for failed updates
+    """
+    results = await gather_with_concurrency(
+        BULK_CONCURRENCY,
+        *(update_message(bot, user_id, text, reply_markup, message_key=message_key, parse_mode=parse_mode)
+          for user_id, text, reply_markup in jobs),
+        return_exceptions=True
+    )
+
+    message_ids = []
+    for (user_id, _, _), result in zip(jobs, results):
+        if isinstance(result, BaseException):
+            logger.error(f"Error updating message for user {user_id}: {result}")
+            result = None
+        message_ids.append(result)
+
+    return message_ids